@@ -0,0 +1,215 @@
+import numpy as np
+import pandas as pd
+
+import country_codes
+
+
+class AggregateCube:
+    """Per-country/year mean unemployment rates materialized as dense NumPy arrays.
+
+    Rates are accumulated once into ``sums``/``counts`` grids shaped
+    (country, sex, age_group, year); the means the charts need are derived from
+    those at build time:
+
+    - ``cells``   (country, sex, age_group, year): mean per demographic cell
+    - ``overall`` (country, year): mean across all sexes and age groups
+    - ``by_sex``  (sex, country, year): mean across age groups
+    - ``by_age``  (age_group, country, year): mean across sexes
+
+    Country names are resolved once to ISO-3 codes (``iso3``, None where
+    unmatched; the names are listed in ``unmatched_countries``).
+
+    A chart then reads one array slice instead of running a groupby, and
+    ``ranking`` (a ``RankIndex``) answers Top-N queries without sorting.
+    """
+
+    def __init__(self, countries, sexes, age_groups, years, sums, counts):
+        self.countries = pd.Index(countries)
+        self.sexes = pd.Index(sexes)
+        self.age_groups = pd.Index(age_groups)
+        self.years = np.asarray(years)
+        self.sums = sums
+        self.counts = counts
+        self.cells = _mean(sums, counts)
+        self.overall = _mean(sums.sum(axis=(1, 2)), counts.sum(axis=(1, 2)))
+        self.by_sex = _mean(sums.sum(axis=2), counts.sum(axis=2)).transpose(1, 0, 2)
+        self.by_age = _mean(sums.sum(axis=1), counts.sum(axis=1)).transpose(1, 0, 2)
+        self.ranking = RankIndex(self)
+        self.iso3, self.unmatched_countries = country_codes.resolve(self.countries)
+        # Shared by every session; CubeAccumulator.from_cube copies before accumulating
+        for array in (self.years, self.sums, self.counts, self.cells, self.overall, self.by_sex, self.by_age, self.iso3):
+            array.flags.writeable = False
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Builds the cube from the tidy table (see ``dataset.tidy``)."""
+        return CubeAccumulator().add(frame).to_cube()
+
+    def year_index(self, year):
+        return int(np.searchsorted(self.years, year))
+
+    def overall_for(self, year):
+        """Mean rate per country in ``year`` across all sexes and age groups."""
+        return self.overall[:, self.year_index(year)]
+
+    def by_sex_for(self, sex, year):
+        return self.by_sex[self.sexes.get_loc(sex), :, self.year_index(year)]
+
+    def by_age_for(self, age_group, year):
+        return self.by_age[self.age_groups.get_loc(age_group), :, self.year_index(year)]
+
+    def cell_for(self, sex, age_group, year):
+        return self.cells[:, self.sexes.get_loc(sex), self.age_groups.get_loc(age_group), self.year_index(year)]
+
+    def to_frame(self, **columns):
+        """Joins per-country value arrays into a frame, dropping countries with no data.
+
+        ``cube.to_frame(unemployment_rate=cube.overall_for(2023))``
+        """
+        frame = pd.DataFrame({'country_name': np.asarray(self.countries, dtype=object), **columns})
+        return frame.dropna().reset_index(drop=True)
+
+
+class RankIndex:
+    """Country order by rate for every (sex, age_group, year) cell of a cube.
+
+    Built once with a single ``argsort`` over the cube and kept as small
+    integer arrays shaped (sex, age_group, year, country):
+
+    - ``order``  country positions sorted by descending rate, countries without data last
+    - ``rank``   position of each country in ``order`` (0 = highest rate)
+    - ``n_valid`` (sex, age_group, year): countries with data in the cell
+
+    so Top-N and Bottom-N are slices of ``order`` and a percentile rank is one
+    lookup in ``rank``. Methods return country positions; pass them to
+    ``frame()`` for a chart-ready table.
+    """
+
+    def __init__(self, cube):
+        self.cube = cube
+        rates = cube.cells.transpose(1, 2, 3, 0)
+        n_countries = rates.shape[-1]
+        dtype = np.int16 if n_countries < 2**15 else np.int32
+        # NaN sorts last, so countries without data trail the ranked ones
+        self.order = np.argsort(-rates, axis=-1, kind='stable').astype(dtype)
+        self.rank = np.empty_like(self.order)
+        np.put_along_axis(self.rank, self.order, np.arange(n_countries, dtype=dtype), axis=-1)
+        self.n_valid = (~np.isnan(rates)).sum(axis=-1).astype(dtype)
+        for array in (self.order, self.rank, self.n_valid):
+            array.flags.writeable = False
+
+    def _cell(self, sex, age_group, year):
+        cube = self.cube
+        return cube.sexes.get_loc(sex), cube.age_groups.get_loc(age_group), cube.year_index(year)
+
+    def top(self, sex, age_group, year, n):
+        """Positions of the ``n`` countries with the highest rate, highest first."""
+        cell = self._cell(sex, age_group, year)
+        return self.order[cell][:min(n, self.n_valid[cell])]
+
+    def bottom(self, sex, age_group, year, n):
+        """Positions of the ``n`` countries with the lowest rate, lowest first."""
+        cell = self._cell(sex, age_group, year)
+        n_valid = int(self.n_valid[cell])
+        return self.order[cell][max(n_valid - n, 0):n_valid][::-1]
+
+    def percentile(self, positions, sex, age_group, year):
+        """Percentile rank (0-100, share of countries with a lower rate) of each position; NaN without data."""
+        cell = self._cell(sex, age_group, year)
+        n_valid = int(self.n_valid[cell])
+        rank = self.rank[cell][positions].astype(np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            pct = np.where(n_valid > 1, 100.0 * (n_valid - 1 - rank) / (n_valid - 1), 100.0)
+        return np.where(rank < n_valid, pct, np.nan)
+
+    def among(self, countries, sex, age_group, year, n=None):
+        """Positions of ``countries`` that have data, highest rate first, keeping the top ``n``.
+
+        Uses the precomputed ranks, so only the subset is touched: an
+        ``argpartition`` picks the top ``n`` and only those are sorted.
+        """
+        cell = self._cell(sex, age_group, year)
+        positions = self.cube.countries.get_indexer(countries)
+        positions = positions[positions >= 0]
+        ranks = self.rank[cell][positions]
+        keep = ranks < self.n_valid[cell]
+        positions, ranks = positions[keep], ranks[keep]
+        if n is not None and n < len(ranks):
+            part = np.argpartition(ranks, n)[:n]
+            positions, ranks = positions[part], ranks[part]
+        return positions[np.argsort(ranks)]
+
+    def frame(self, positions, sex, age_group, year):
+        """Chart-ready rows for ``positions``: country, rate and percentile rank, in the given order."""
+        s, a, y = self._cell(sex, age_group, year)
+        return pd.DataFrame({
+            'country_name': np.asarray(self.cube.countries, dtype=object)[positions],
+            'unemployment_rate': self.cube.cells[positions, s, a, y],
+            'percentile_rank': self.percentile(positions, sex, age_group, year),
+        })
+
+
+class CubeAccumulator:
+    """Running per-cell sums and counts that can be fed the tidy table chunk by chunk.
+
+    Labels are registered in the order they are first seen and the grids grow
+    as new countries, sexes, age groups or years appear, so memory depends on
+    the number of distinct labels rather than on the number of rows added.
+    """
+
+    AXES = ('country_name', 'sex', 'age_group', 'year')
+
+    def __init__(self):
+        self.labels = [{} for _ in self.AXES]
+        self.sums = np.zeros((0,) * len(self.AXES))
+        self.counts = np.zeros((0,) * len(self.AXES), dtype=np.int64)
+
+    @classmethod
+    def from_cube(cls, cube):
+        """Seeds an accumulator with the sums and counts of an existing cube."""
+        accumulator = cls()
+        axes = (cube.countries.tolist(), cube.sexes.tolist(), cube.age_groups.tolist(), cube.years.tolist())
+        accumulator.labels = [{label: i for i, label in enumerate(labels)} for labels in axes]
+        accumulator.sums = cube.sums.copy()
+        accumulator.counts = cube.counts.astype(np.int64)
+        return accumulator
+
+    def add(self, frame):
+        """Accumulates the rates of a tidy chunk; returns ``self`` for chaining."""
+        values = frame['unemployment_rate'].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(values)
+        coords = []
+        for axis, col in enumerate(self.AXES):
+            codes, uniques = pd.factorize(frame[col])
+            lookup = self.labels[axis]
+            mapping = np.array([lookup.setdefault(label, len(lookup)) for label in uniques.tolist()] + [-1])
+            coords.append(mapping[codes])  # NaN labels map to -1 via the sentinel slot
+            valid &= codes >= 0
+
+        shape = tuple(len(lookup) for lookup in self.labels)
+        if shape != self.sums.shape:
+            pad = [(0, new - old) for new, old in zip(shape, self.sums.shape)]
+            self.sums = np.pad(self.sums, pad)
+            self.counts = np.pad(self.counts, pad)
+
+        flat = np.ravel_multi_index(tuple(c[valid] for c in coords), shape)
+        size = int(np.prod(shape))
+        self.sums += np.bincount(flat, weights=values[valid], minlength=size).reshape(shape)
+        self.counts += np.bincount(flat, minlength=size).reshape(shape)
+        return self
+
+    def to_cube(self):
+        """Returns an ``AggregateCube`` with every axis sorted by label."""
+        sums, counts, axes = self.sums, self.counts, []
+        for axis, lookup in enumerate(self.labels):
+            labels = np.array(list(lookup), dtype=object if axis < 3 else np.int16)
+            order = np.argsort(labels, kind='stable')
+            sums = np.take(sums, order, axis=axis)
+            counts = np.take(counts, order, axis=axis)
+            axes.append(labels[order])
+        return AggregateCube(*axes, sums, counts.astype(np.int32))
+
+
+def _mean(sums, counts):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (sums / counts).astype(np.float32)
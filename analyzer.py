@@ -1,22 +1,103 @@
 import streamlit as st
-import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
+from dataset import load_data
+from figure_cache import get_figure_cache
+from forecasting import MODELS, get_forecasts
+from profiling import fragment, stage
+from similarity import METRICS, get_similarity_index
+from static_assets import page_background
+
+
+# --- Chart builders (return an open figure; the figure cache closes it) ---
+def trend_figure(trend_data, country, sex, age_group, forecast=None, forecast_label=None, level=None):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    sns.lineplot(data=trend_data, x='year', y='unemployment_rate', marker='o', ax=ax)
+    title = f'Unemployment Rate Trend in {country} ({sex}, {age_group})'
+    if forecast is not None:
+        # Dashed projection continuing from the last observed year, with its prediction interval
+        history = trend_data.groupby('year')['unemployment_rate'].mean().dropna()
+        color = sns.color_palette()[1]
+        ax.plot(
+            np.concatenate([history.index[-1:], forecast.years]), np.concatenate([history.values[-1:], forecast.mean]),
+            linestyle='--', marker='o', color=color, label=f'Forecast ({forecast_label})',
+        )
+        ax.fill_between(forecast.years, forecast.lower, forecast.upper, color=color, alpha=0.2, label=f'{level:.0%} prediction interval')
+        ax.legend()
+        title += ' with Forecast'
+    ax.set_title(title)
+    ax.set_xlabel('Year')
+    ax.set_ylabel('Unemployment Rate (%)')
+    ax.grid(True)
+    return fig
+
+
+def comparison_figure(comp_data, n_countries, year):
+    fig, ax = plt.subplots(figsize=(12, 8))
+    sns.barplot(data=comp_data, x='unemployment_rate', y='country_name', ax=ax)
+    ax.set_title(f'Top {n_countries} Countries by Unemployment Rate in {year}')
+    ax.set_xlabel('Unemployment Rate (%)')
+    ax.set_ylabel('Country')
+    return fig
+
+
+def breakdown_figure(detail_data, column, label, country, year):
+    fig, ax = plt.subplots(figsize=(8, 5))
+    sns.barplot(data=detail_data, x=column, y='unemployment_rate', ax=ax, estimator=sum)
+    ax.set_title(f'Unemployment Rate by {label} in {country} ({year})')
+    ax.set_xlabel(label)
+    ax.set_ylabel('Unemployment Rate (%)')
+    return fig
+
+
+def distribution_figure(dist, year, subgroup='All series'):
+    """Draws a precomputed ``distributions.Distribution`` the way ``sns.histplot(kde=True)`` would."""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    color = sns.color_palette()[0]
+    ax.bar(dist.edges[:-1], dist.counts, width=np.diff(dist.edges), align='edge', color=color, alpha=0.75, edgecolor='white')
+    if dist.kde_y is not None:
+        ax.plot(dist.kde_x, dist.kde_y, color=color)
+    suffix = '' if subgroup == 'All series' else f' ({subgroup})'
+    ax.set_title(f'Distribution of Unemployment Rates in {year}{suffix}')
+    ax.set_xlabel('Unemployment Rate (%)')
+    ax.set_ylabel('Frequency')
+    return fig
+
+
+def correlation_figure(corr_matrix, subgroup='All series'):
+    fig, ax = plt.subplots(figsize=(12, 8))
+    # Per-cell annotations get unreadable (and slow to draw) on wide year ranges
+    sns.heatmap(corr_matrix, annot=len(corr_matrix) <= 15, cmap='coolwarm', fmt=".2f", ax=ax)
+    ax.set_title(f'Correlation Heatmap of Unemployment Rates Between Years ({subgroup})')
+    return fig
+
+
+def similarity_figure(cube, country, neighbours, sex, age_group, metric_label):
+    """Draws the cube series of ``country`` (bold) and of its nearest ``neighbours``."""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    s, a = cube.sexes.get_loc(sex), cube.age_groups.get_loc(age_group)
+    for name in neighbours:
+        ax.plot(cube.years, cube.cells[cube.countries.get_loc(name), s, a], marker='o', alpha=0.6, label=name)
+    ax.plot(cube.years, cube.cells[cube.countries.get_loc(country), s, a], marker='o', color='black', linewidth=3, label=country)
+    ax.set_title(f'Countries with Trajectories Similar to {country} ({sex}, {age_group}; {metric_label})')
+    ax.set_xlabel('Year')
+    ax.set_ylabel('Unemployment Rate (%)')
+    ax.grid(True)
+    ax.legend()
+    return fig
+
+
+def show_figure(figures, key, build):
+    """Sends the image for ``key`` ``(version, section, *filters)``, rendering it only on a cache miss."""
+    with stage(f'{key[1]}.render'):
+        image = figures.render(key, build)
+    with stage(f'{key[1]}.serialize'):
+        st.image(image, width='stretch')
+
+
 def analyzer_page():
-    st.markdown(
-        """
-        <style>
-        .stApp {
-            background-image: linear-gradient(rgba(0,0,0,0.6), rgba(0,0,0,0.6)), 
-                              url("https://wallpaperbat.com/img/879351-analysis-wallpaper-top-free-analysis-background.jpg");
-            background-size: cover;
-            background-repeat: no-repeat;
-            background-attachment: fixed;
-        }
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
+    page_background()
     st.markdown(
         """
         <h1 style="
@@ -46,122 +127,176 @@ def analyzer_page():
         unsafe_allow_html=True
     )
     st.subheader("Analyze employment trends for specific countries.")
-# Load data
-    @st.cache_data
-    def load_data(file_path):
-        df = pd.read_csv(file_path)
-        return df
-
-    df = load_data('global_unemployment_data.csv')
-
     # --- Main Filter Options ---
+    # Each section is a fragment: its widgets rerun only that section, and the
+    # charts of the other sections stay on screen
     with st.expander("Filter Options", expanded=True):
-        # Melt the dataframe to make it tidy
-        id_vars = ['country_name', 'indicator_name', 'sex', 'age_group', 'age_categories']
-        value_vars = [col for col in df.columns if col.startswith('20')]
-        df_melted = pd.melt(df, id_vars=id_vars, value_vars=value_vars, var_name='year', value_name='unemployment_rate')
-        df_melted['year'] = pd.to_numeric(df_melted['year'])
-
-        # --- Graph 1: Unemployment Rate Trend ---
-        st.subheader('1. Unemployment Rate Trend Over Time')
-        selected_country_trend = st.selectbox('Select a Country', df_melted['country_name'].unique(), key='trend_country')
-        selected_sex_trend = st.selectbox('Select Sex', df_melted['sex'].unique(), key='trend_sex')
-        selected_age_trend = st.selectbox('Select Age Group', df_melted['age_group'].unique(), key='trend_age')
-
-        if st.button('Generate Trend Plot', key='trend_button'):
-            trend_data = df_melted[
-                (df_melted['country_name'] == selected_country_trend) &
-                (df_melted['sex'] == selected_sex_trend) &
-                (df_melted['age_group'] == selected_age_trend)
-            ]
-            if not trend_data.empty:
-                fig, ax = plt.subplots(figsize=(10, 6))
-                sns.lineplot(data=trend_data, x='year', y='unemployment_rate', marker='o', ax=ax)
-                ax.set_title(f'Unemployment Rate Trend in {selected_country_trend} ({selected_sex_trend}, {selected_age_trend})')
-                ax.set_xlabel('Year')
-                ax.set_ylabel('Unemployment Rate (%)')
-                ax.grid(True)
-                st.pyplot(fig)
-            else:
-                st.write("No data available for the selected criteria.")
-
-        # --- Graph 2: Compare Unemployment Rates Across Countries ---
-        st.subheader('2. Compare Unemployment Rates Across Countries')
-        selected_year_comp = st.slider('Select Year for Comparison', min_value=2014, max_value=2024, value=2023, key='comp_year')
-        selected_sex_comp = st.selectbox('Select Sex', df_melted['sex'].unique(), key='comp_sex')
-        selected_age_comp = st.selectbox('Select Age Group', df_melted['age_group'].unique(), key='comp_age')
-        n_countries = st.slider('Top N Countries', min_value=5, max_value=20, value=10, key='n_countries')
-
-        if st.button('Generate Comparison Plot', key='comp_button'):
-            comp_data = df_melted[
-                (df_melted['year'] == selected_year_comp) &
-                (df_melted['sex'] == selected_sex_comp) &
-                (df_melted['age_group'] == selected_age_comp)
-            ].sort_values(by='unemployment_rate', ascending=False).head(n_countries)
-
-            if not comp_data.empty:
-                fig, ax = plt.subplots(figsize=(12, 8))
-                sns.barplot(data=comp_data, x='unemployment_rate', y='country_name', ax=ax)
-                ax.set_title(f'Top {n_countries} Countries by Unemployment Rate in {selected_year_comp}')
-                ax.set_xlabel('Unemployment Rate (%)')
-                ax.set_ylabel('Country')
-                st.pyplot(fig)
-            else:
-                st.write("No data available for the selected criteria.")
-
-        # --- Graph 3 & 4: Unemployment by Sex and Age Group ---
-        st.subheader('3. Unemployment by Sex and Age Group in a Country')
-        selected_country_detail = st.selectbox('Select a Country', df_melted['country_name'].unique(), key='detail_country')
-        selected_year_detail = st.slider('Select Year', min_value=2014, max_value=2024, value=2023, key='detail_year')
-
-        if st.button('Show Details', key='detail_button'):
-            detail_data = df_melted[
-                (df_melted['country_name'] == selected_country_detail) &
-                (df_melted['year'] == selected_year_detail)
-            ]
-            if not detail_data.empty:
-                # By Sex
-                fig1, ax1 = plt.subplots(figsize=(8, 5))
-                sns.barplot(data=detail_data, x='sex', y='unemployment_rate', ax=ax1, estimator=sum)
-                ax1.set_title(f'Unemployment Rate by Sex in {selected_country_detail} ({selected_year_detail})')
-                ax1.set_xlabel('Sex')
-                ax1.set_ylabel('Unemployment Rate (%)')
-                st.pyplot(fig1)
-
-                # By Age Group
-                fig2, ax2 = plt.subplots(figsize=(8, 5))
-                sns.barplot(data=detail_data, x='age_group', y='unemployment_rate', ax=ax2, estimator=sum)
-                ax2.set_title(f'Unemployment Rate by Age Group in {selected_country_detail} ({selected_year_detail})')
-                ax2.set_xlabel('Age Group')
-                ax2.set_ylabel('Unemployment Rate (%)')
-                st.pyplot(fig2)
-            else:
-                st.write("No data available for the selected criteria.")
-
-        # --- Graph 5: Distribution of Unemployment Rates ---
-        st.subheader('4. Distribution of Unemployment Rates')
-        selected_year_dist = st.slider('Select Year for Distribution', min_value=2014, max_value=2024, value=2023, key='dist_year')
-
-        if st.button('Generate Distribution Plot', key='dist_button'):
-            dist_data = df_melted[df_melted['year'] == selected_year_dist]
-            if not dist_data.empty:
-                fig, ax = plt.subplots(figsize=(10, 6))
-                sns.histplot(dist_data['unemployment_rate'], kde=True, ax=ax, bins=30)
-                ax.set_title(f'Distribution of Unemployment Rates in {selected_year_dist}')
-                ax.set_xlabel('Unemployment Rate (%)')
-                ax.set_ylabel('Frequency')
-                st.pyplot(fig)
-            else:
-                st.write("No data available for the selected criteria.")
-
-
-        # --- Graph 6: Correlation Heatmap ---
-        st.subheader('5. Correlation of Unemployment Rates Between Years')
-        if st.button('Show Correlation Heatmap', key='corr_button'):
-            year_cols = [col for col in df.columns if col.startswith('20')]
-            corr_df = df[year_cols]
-
-            fig, ax = plt.subplots(figsize=(12, 8))
-            sns.heatmap(corr_df.corr(), annot=True, cmap='coolwarm', fmt=".2f", ax=ax)
-            ax.set_title('Correlation Heatmap of Unemployment Rates Between Years')
-            st.pyplot(fig)
\ No newline at end of file
+        trend_section()
+        comparison_section()
+        detail_section()
+        distribution_section()
+        correlation_section()
+        similarity_section()
+
+
+def _year_range(cube):
+    return int(cube.years.min()), int(cube.years.max())
+
+
+# --- Graph 1: Unemployment Rate Trend ---
+@fragment('trend')
+def trend_section():
+    # Load data (parsed and melted once, shared with the dashboard)
+    with stage('load'):
+        data = load_data()
+    cube = data.cube
+    st.subheader('1. Unemployment Rate Trend Over Time')
+    selected_country_trend = st.selectbox('Select a Country', cube.countries, key='trend_country')
+    selected_sex_trend = st.selectbox('Select Sex', cube.sexes, key='trend_sex')
+    selected_age_trend = st.selectbox('Select Age Group', cube.age_groups, key='trend_age')
+    forecast_model = st.selectbox('Forecast', [None, *MODELS], format_func=lambda m: 'None' if m is None else MODELS[m], key='trend_model')
+
+    if st.button('Generate Trend Plot', key='trend_button'):
+        with stage('trend.filter'):
+            trend_data = data.select(country_name=selected_country_trend, sex=selected_sex_trend, age_group=selected_age_trend)
+        forecast, level = None, None
+        if forecast_model is not None:
+            forecasts = get_forecasts(data, forecast_model)
+            forecast, level = forecasts.cell(selected_country_trend, selected_sex_trend, selected_age_trend), forecasts.level
+        if not trend_data.empty:
+            show_figure(
+                get_figure_cache(), (data.version, 'trend', selected_country_trend, selected_sex_trend, selected_age_trend, forecast_model),
+                lambda: trend_figure(
+                    trend_data, selected_country_trend, selected_sex_trend, selected_age_trend,
+                    forecast, MODELS.get(forecast_model), level,
+                ),
+            )
+        else:
+            st.write("No data available for the selected criteria.")
+
+
+# --- Graph 2: Compare Unemployment Rates Across Countries ---
+@fragment('comparison')
+def comparison_section():
+    with stage('load'):
+        data = load_data()
+    cube = data.cube
+    min_year, max_year = _year_range(cube)
+    st.subheader('2. Compare Unemployment Rates Across Countries')
+    selected_year_comp = st.slider('Select Year for Comparison', min_value=min_year, max_value=max_year, value=max(min_year, max_year - 1), key='comp_year')
+    selected_sex_comp = st.selectbox('Select Sex', cube.sexes, key='comp_sex')
+    selected_age_comp = st.selectbox('Select Age Group', cube.age_groups, key='comp_age')
+    n_countries = st.slider('Top N Countries', min_value=5, max_value=20, value=10, key='n_countries')
+
+    if st.button('Generate Comparison Plot', key='comp_button'):
+        with stage('comparison.filter'):
+            comp_cell = (selected_sex_comp, selected_age_comp, selected_year_comp)
+            comp_data = cube.ranking.frame(cube.ranking.top(*comp_cell, n_countries), *comp_cell)
+
+        if not comp_data.empty:
+            show_figure(
+                get_figure_cache(), (data.version, 'comparison', selected_year_comp, selected_sex_comp, selected_age_comp, n_countries),
+                lambda: comparison_figure(comp_data, n_countries, selected_year_comp),
+            )
+        else:
+            st.write("No data available for the selected criteria.")
+
+
+# --- Graph 3 & 4: Unemployment by Sex and Age Group ---
+@fragment('detail')
+def detail_section():
+    with stage('load'):
+        data = load_data()
+    cube = data.cube
+    min_year, max_year = _year_range(cube)
+    figures = get_figure_cache()
+    st.subheader('3. Unemployment by Sex and Age Group in a Country')
+    selected_country_detail = st.selectbox('Select a Country', cube.countries, key='detail_country')
+    selected_year_detail = st.slider('Select Year', min_value=min_year, max_value=max_year, value=max(min_year, max_year - 1), key='detail_year')
+
+    if st.button('Show Details', key='detail_button'):
+        with stage('detail.filter'):
+            detail_data = data.select(country_name=selected_country_detail, year=selected_year_detail)
+        if not detail_data.empty:
+            # By Sex
+            show_figure(
+                figures, (data.version, 'detail', 'sex', selected_country_detail, selected_year_detail),
+                lambda: breakdown_figure(detail_data, 'sex', 'Sex', selected_country_detail, selected_year_detail),
+            )
+
+            # By Age Group
+            show_figure(
+                figures, (data.version, 'detail', 'age_group', selected_country_detail, selected_year_detail),
+                lambda: breakdown_figure(detail_data, 'age_group', 'Age Group', selected_country_detail, selected_year_detail),
+            )
+        else:
+            st.write("No data available for the selected criteria.")
+
+
+# --- Graph 5: Distribution of Unemployment Rates ---
+@fragment('distribution')
+def distribution_section():
+    with stage('load'):
+        data = load_data()
+    min_year, max_year = _year_range(data.cube)
+    st.subheader('4. Distribution of Unemployment Rates')
+    selected_year_dist = st.slider('Select Year for Distribution', min_value=min_year, max_value=max_year, value=max(min_year, max_year - 1), key='dist_year')
+    dist_groups = {'All series': (None, None)}
+    dist_groups.update({f'{by.replace("_", " ").capitalize()}: {value}': (by, value) for by, value in data.distributions.subgroups()})
+    selected_group_dist = st.selectbox('Select Subgroup', list(dist_groups), key='dist_group')
+
+    if st.button('Generate Distribution Plot', key='dist_button'):
+        with stage('distribution.filter'):
+            dist = data.distributions.get(selected_year_dist, *dist_groups[selected_group_dist])
+        if dist is not None:
+            show_figure(
+                get_figure_cache(), (data.version, 'distribution', selected_year_dist, selected_group_dist),
+                lambda: distribution_figure(dist, selected_year_dist, selected_group_dist),
+            )
+        else:
+            st.write("No data available for the selected criteria.")
+
+
+# --- Graph 6: Correlation Heatmap ---
+@fragment('correlation')
+def correlation_section():
+    with stage('load'):
+        data = load_data()
+    st.subheader('5. Correlation of Unemployment Rates Between Years')
+    corr_groups = {'All series': (None, None)}
+    corr_groups.update({f'{by.replace("_", " ").capitalize()}: {value}': (by, value) for by, value in data.correlations.subgroups()})
+    selected_group_corr = st.selectbox('Select Subgroup', list(corr_groups), key='corr_group')
+
+    if st.button('Show Correlation Heatmap', key='corr_button'):
+        def build_correlation():
+            with stage('aggregate'):
+                corr_matrix = data.correlations.matrix(*corr_groups[selected_group_corr])
+            return correlation_figure(corr_matrix, selected_group_corr)
+
+        show_figure(get_figure_cache(), (data.version, 'correlation', selected_group_corr), build_correlation)
+
+
+# --- Graph 7: Countries with Similar Trajectories ---
+@fragment('similarity')
+def similarity_section():
+    with stage('load'):
+        data = load_data()
+    cube = data.cube
+    st.subheader('6. Countries with Similar Unemployment Trajectories')
+    selected_country_sim = st.selectbox('Select a Country', cube.countries, key='sim_country')
+    selected_sex_sim = st.selectbox('Select Sex', cube.sexes, key='sim_sex')
+    selected_age_sim = st.selectbox('Select Age Group', cube.age_groups, key='sim_age')
+    selected_metric_sim = st.selectbox('Distance', list(METRICS), format_func=METRICS.get, key='sim_metric')
+    k_similar = st.slider('Number of Similar Countries', min_value=1, max_value=10, value=5, key='sim_k')
+
+    if st.button('Find Similar Countries', key='sim_button'):
+        with stage('similarity.query'):
+            similar = get_similarity_index(data).frame(selected_country_sim, selected_sex_sim, selected_age_sim, k_similar, selected_metric_sim)
+        if not similar.empty:
+            show_figure(
+                get_figure_cache(), (data.version, 'similarity', selected_country_sim, selected_sex_sim, selected_age_sim, selected_metric_sim, k_similar),
+                lambda: similarity_figure(cube, selected_country_sim, similar['country_name'], selected_sex_sim, selected_age_sim, METRICS[selected_metric_sim]),
+            )
+            st.dataframe(similar.rename(columns={'country_name': 'Country', 'distance': 'Distance'}), hide_index=True)
+        else:
+            st.write("Not enough data for the selected country to compare trajectories.")
\ No newline at end of file
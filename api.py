@@ -0,0 +1,397 @@
+"""Lightweight asyncio HTTP/JSON API over the dashboard's dataset.
+
+Serves the same numbers as the Streamlit pages without per-session overhead:
+
+    GET  /trend?country=Germany&sex=Male&age_group=25%2B   (repeat ``country`` for several series)
+    GET  /top?year=2023&sex=Female&age_group=15-24&n=10&order=desc
+    GET  /youth-adult?year=2023
+    GET  /map?year=2023
+    GET  /meta
+    POST /batch   {"queries": [{"query": "trend", "country": "Chad", ...}, ...]}
+
+Answers are read from the aggregate cube of the shared dataset (picking up CSV
+changes like the app does) and kept in an LRU response cache keyed by dataset
+version and normalized query. Every response carries an ETag; a request whose
+``If-None-Match`` matches gets ``304 Not Modified``. Connections are kept alive.
+
+    python api.py --host 0.0.0.0 --port 8600
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+import dataset
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENTRIES = int(os.environ.get('API_CACHE_ENTRIES', 4096))
+MAX_BODY_BYTES = 1 << 20
+MAX_BATCH = 500
+
+STATUS_TEXT = {
+    200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    413: 'Payload Too Large', 500: 'Internal Server Error',
+}
+
+
+class QueryError(ValueError):
+    """Invalid query parameters; reported to the client as 400."""
+
+
+def _rate(value):
+    value = float(value)
+    return None if math.isnan(value) else round(value, 3)
+
+
+def _param(params, name, default=None):
+    value = params.get(name, default)
+    if isinstance(value, list):
+        value = value[0] if value else default
+    if value is None:
+        raise QueryError(f"missing parameter '{name}'")
+    return value
+
+
+def _label(labels, value, name):
+    try:
+        return labels.get_loc(value)
+    except KeyError:
+        raise QueryError(f"unknown {name} '{value}'") from None
+
+
+def _integer(params, name, default=None):
+    """An integer parameter given as an integral JSON number or a string of digits."""
+    value = _param(params, name, default)
+    try:
+        if isinstance(value, str) and re.fullmatch(r'[+-]?[0-9]+', value.strip()):
+            return int(value)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+    except (ValueError, TypeError, OverflowError):
+        pass
+    raise QueryError(f"'{name}' must be an integer")
+
+
+def _year(cube, params):
+    year = _integer(params, 'year')
+    in_range = cube.years[0] <= year <= cube.years[-1]
+    index = int(np.searchsorted(cube.years, year)) if in_range else 0
+    if not in_range or cube.years[index] != year:
+        raise QueryError(f"no data for year {year}")
+    return year, index
+
+
+# --- Queries: each takes the dataset and a params dict and returns JSON-able data ---
+def query_trend(data, params):
+    cube = data.cube
+    countries = params.get('country')
+    countries = countries if isinstance(countries, list) else [_param(params, 'country')]
+    s = _label(cube.sexes, _param(params, 'sex'), 'sex')
+    a = _label(cube.age_groups, _param(params, 'age_group'), 'age_group')
+    series = []
+    for country in countries:
+        c = _label(cube.countries, country, 'country')
+        series.append({'country': country, 'values': [_rate(v) for v in cube.cells[c, s, a]]})
+    return {'years': cube.years.tolist(), 'sex': cube.sexes[s], 'age_group': cube.age_groups[a], 'series': series}
+
+
+def query_top(data, params):
+    cube = data.cube
+    year, _ = _year(cube, params)
+    s = _label(cube.sexes, _param(params, 'sex'), 'sex')
+    a = _label(cube.age_groups, _param(params, 'age_group'), 'age_group')
+    n = _integer(params, 'n', 10)
+    order = _param(params, 'order', 'desc')
+    if order not in ('asc', 'desc'):
+        raise QueryError("'order' must be 'asc' or 'desc'")
+    cell = (cube.sexes[s], cube.age_groups[a], year)
+    ranked = (cube.ranking.top if order == 'desc' else cube.ranking.bottom)(*cell, max(n, 0))
+    rows = cube.ranking.frame(ranked, *cell)
+    return {
+        'year': year, 'sex': cell[0], 'age_group': cell[1], 'order': order,
+        'countries': [
+            {'country': country, 'rate': _rate(rate), 'percentile': _rate(pct)}
+            for country, rate, pct in zip(rows['country_name'], rows['unemployment_rate'], rows['percentile_rank'])
+        ],
+    }
+
+
+def query_youth_adult(data, params):
+    cube = data.cube
+    year, _ = _year(cube, params)
+    youth = cube.by_age_for('15-24', year)
+    adult = cube.by_age_for('25+', year)
+    keep = np.flatnonzero(~np.isnan(youth) & ~np.isnan(adult))
+    return {
+        'year': year,
+        'countries': [{'country': cube.countries[i], 'youth': _rate(youth[i]), 'adult': _rate(adult[i])} for i in keep],
+    }
+
+
+def query_map(data, params):
+    cube = data.cube
+    year, _ = _year(cube, params)
+    rates = cube.overall_for(year)
+    keep = np.flatnonzero(~np.isnan(rates))
+    return {
+        'year': year,
+        'countries': [{'country': cube.countries[i], 'iso3': cube.iso3[i], 'rate': _rate(rates[i])} for i in keep],
+    }
+
+
+def query_meta(data, params):
+    cube = data.cube
+    return {
+        'version': data.version,
+        'years': cube.years.tolist(),
+        'countries': cube.countries.tolist(),
+        'sexes': cube.sexes.tolist(),
+        'age_groups': cube.age_groups.tolist(),
+    }
+
+
+QUERIES = {
+    'trend': query_trend,
+    'top': query_top,
+    'youth-adult': query_youth_adult,
+    'map': query_map,
+    'meta': query_meta,
+}
+
+
+class ResponseCache:
+    """Thread-safe LRU of encoded response bodies keyed by (dataset version, query)."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+SCALARS = (str, int, float)
+
+
+def _log_refresh_error(future):
+    if future.exception() is not None:
+        logger.error("Refreshing the dataset failed, still serving the previous one", exc_info=future.exception())
+
+
+def _normalize(params):
+    """Hashable form of ``params``; values must be scalars or lists of scalars."""
+    normalized = []
+    for k, v in params.items():
+        values = v if isinstance(v, list) else [v]
+        if not all(isinstance(value, SCALARS) for value in values):
+            raise QueryError(f"parameter '{k}' must be a string, a number or a list of them")
+        normalized.append((k, tuple(values)))
+    return tuple(sorted(normalized))
+
+
+class QueryService:
+    """Answers queries against the watched dataset through the response cache.
+
+    A changed CSV is refreshed on a worker thread; queries keep being answered
+    from the previous dataset until the refreshed one is ready, so the event
+    loop never waits for a reload.
+    """
+
+    def __init__(self, csv_path=dataset.DATA_FILE, cache_entries=CACHE_ENTRIES):
+        self.watcher = dataset.DatasetWatcher(csv_path)
+        self.cache = ResponseCache(cache_entries)
+        self._refresher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='api-refresh')
+        self._refresh = None
+
+    def current(self):
+        """The current dataset, starting a background refresh when the CSV changed."""
+        try:
+            changed = self.watcher.changed()
+        except OSError as e:
+            logger.warning("Cannot stat %s, serving the loaded dataset: %s", self.watcher.file_path, e)
+            changed = False
+        if changed and (self._refresh is None or self._refresh.done()):
+            self._refresh = self._refresher.submit(self.watcher.get)
+            self._refresh.add_done_callback(_log_refresh_error)
+        return self.watcher.data
+
+    def answer(self, name, params):
+        """Returns ``(body_bytes, etag)`` for one query; raises ``QueryError``."""
+        if not isinstance(name, str) or name not in QUERIES:
+            raise QueryError(f"unknown query {name!r}")
+        data = self.current()
+        key = (data.version, name, _normalize(params))
+        entry = self.cache.get(key)
+        if entry is None:
+            body = json.dumps(QUERIES[name](data, params), separators=(',', ':')).encode()
+            entry = (body, '"%s"' % hashlib.blake2b(body, digest_size=12).hexdigest())
+            self.cache.put(key, entry)
+        return entry
+
+    def batch(self, queries):
+        """Answers a list of ``{"query": name, **params}``; per-item errors don't fail the batch."""
+        if not isinstance(queries, list):
+            raise QueryError("'queries' must be a list")
+        if len(queries) > MAX_BATCH:
+            raise QueryError(f"at most {MAX_BATCH} queries per batch")
+        parts = []
+        for item in queries:
+            if not isinstance(item, dict):
+                parts.append(b'{"error":"each query must be an object"}')
+                continue
+            params = {k: v for k, v in item.items() if k != 'query'}
+            try:
+                body, _ = self.answer(item.get('query'), params)
+                parts.append(body)
+            except QueryError as e:
+                parts.append(json.dumps({'error': str(e)}).encode())
+        body = b'{"results":[' + b','.join(parts) + b']}'
+        return body, '"%s"' % hashlib.blake2b(body, digest_size=12).hexdigest()
+
+
+def _response(status, body=b'', etag=None, keep_alive=True):
+    headers = [
+        f'HTTP/1.1 {status} {STATUS_TEXT[status]}',
+        'Content-Type: application/json',
+        f'Content-Length: {len(body)}',
+        'Cache-Control: no-cache',
+        f'Connection: {"keep-alive" if keep_alive else "close"}',
+    ]
+    if etag:
+        headers.append(f'ETag: {etag}')
+    return ('\r\n'.join(headers) + '\r\n\r\n').encode() + body
+
+
+def _error(status, message, keep_alive=True):
+    return _response(status, json.dumps({'error': message}).encode(), keep_alive=keep_alive)
+
+
+async def handle_connection(service, reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            try:
+                method, target, version = request_line.decode('latin-1').split()
+            except ValueError:
+                writer.write(_error(400, 'malformed request line', keep_alive=False))
+                break
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            keep_alive = headers.get('connection', '').lower() != 'close' and version != 'HTTP/1.0'
+
+            try:
+                length = int(headers.get('content-length') or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                writer.write(_error(400, 'invalid Content-Length', keep_alive=False))
+                break
+            if length > MAX_BODY_BYTES:
+                writer.write(_error(413, 'request body too large', keep_alive=False))
+                break
+            body = await reader.readexactly(length) if length else b''
+
+            try:
+                response = dispatch(service, method, target, headers, body, keep_alive)
+            except Exception:
+                logger.exception("Failed to answer %s %s", method, target)
+                writer.write(_error(500, 'internal error', keep_alive=False))
+                break
+            writer.write(response)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    except Exception:
+        logger.exception("Connection handler failed")
+    finally:
+        writer.close()
+
+
+def dispatch(service, method, target, headers, body, keep_alive=True):
+    """Routes one request and returns the full HTTP response bytes."""
+    url = urlsplit(target)
+    name = url.path.strip('/')
+    try:
+        if name == 'batch':
+            if method != 'POST':
+                return _error(405, 'use POST for /batch', keep_alive)
+            try:
+                payload = json.loads(body or b'{}')
+            except ValueError:
+                raise QueryError('body must be JSON') from None
+            result, etag = service.batch(payload.get('queries') if isinstance(payload, dict) else None)
+        elif name in QUERIES:
+            if method not in ('GET', 'HEAD'):
+                return _error(405, f'use GET for /{name}', keep_alive)
+            params = {k: v if len(v) > 1 else v[0] for k, v in parse_qs(url.query).items()}
+            result, etag = service.answer(name, params)
+        elif name == 'health':
+            return _response(200, b'{"status":"ok"}', keep_alive=keep_alive)
+        else:
+            return _error(404, f'unknown endpoint /{name}', keep_alive)
+    except QueryError as e:
+        return _error(400, str(e), keep_alive)
+
+    if etag in [tag.strip() for tag in headers.get('if-none-match', '').split(',')]:
+        return _response(304, etag=etag, keep_alive=keep_alive)
+    return _response(200, b'' if method == 'HEAD' else result, etag, keep_alive)
+
+
+async def serve(host, port, csv_path):
+    service = QueryService(csv_path)
+    server = await asyncio.start_server(lambda r, w: handle_connection(service, r, w), host, port, backlog=1024)
+    logger.info("Serving on %s", ', '.join(str(sock.getsockname()) for sock in server.sockets))
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8600)
+    parser.add_argument('--csv', default=dataset.DATA_FILE, help="Source CSV (default: %(default)s)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    try:
+        asyncio.run(serve(args.host, args.port, args.csv))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
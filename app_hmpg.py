@@ -1,10 +1,11 @@
+import time
+SCRIPT_START = time.perf_counter()
+
 import streamlit as st
 import streamlit_option_menu as option_menu
-from streamlit_lottie import st_lottie
-import json
-import streamlit.components.v1 as components
-from dashboard import dashboard_page
-from analyzer import analyzer_page
+from static_assets import lottie_row, page_background
+# Page modules (and plotly/seaborn/matplotlib with them) are imported on first use in the routing below
+from profiling import import_page, run_page
 
 st.set_page_config(page_title="Global Unemployment Analysis", page_icon="🌐", layout="centered")
 
@@ -38,20 +39,7 @@ def homepage():
         """,
         unsafe_allow_html=True
     )
-    st.markdown(
-        """
-        <style>
-        .stApp {
-            background-image: linear-gradient(rgba(0,0,0,0.6), rgba(0,0,0,0.6)), 
-                              url("https://wallpaperbat.com/img/879351-analysis-wallpaper-top-free-analysis-background.jpg");
-            background-size: cover;
-            background-repeat: no-repeat;
-            background-attachment: fixed;
-        }
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
+    page_background()
     st.markdown(
         """
         <h3 style="text-align: center;">
@@ -68,71 +56,23 @@ def homepage():
 
     with col1:
         st.header("Welcome to Our Dashboard")
-        json1 = "https://lottie.host/02c12a6c-dead-4c3e-a233-0b5e6b06453d/4S1l8e9JXV.json"
-        components.html(f"""
-        <div id="lottie" style="height: 200px; background: transparent; margin: auto;"></div>
-        <script src="https://cdnjs.cloudflare.com/ajax/libs/lottie-web/5.10.2/lottie.min.js"></script>
-        <script>
-            lottie.loadAnimation({{
-                container: document.getElementById('lottie'),
-                renderer: 'svg',
-                loop: true,
-                autoplay: true,
-                path: '{json1}',
-                rendererSettings: {{
-                    preserveAspectRatio: 'xMidYMid meet',
-                    progressiveLoad: true,
-                    clearCanvas: true
-                }}
-            }});
-        </script>
-        """, height=200)
+    with col2:
+        st.header("About Us")
+    with col3:
+        st.header("Contact Us")
+
+    # The three animations share one iframe so the lottie library is loaded once
+    lottie_row([('welcome', 200, '📊'), ('about', 300, '🌍'), ('contact', 200, '✉️')], height=300)
+
+    col1, col2, col3 = st.columns([1, 1, 1])
+
+    with col1:
         st.write("This website provides insights into global unemployment trends.")
 
     with col2:
-        st.header("About Us")
-        json2 = "https://lottie.host/bcf3116a-d3a1-4316-b1a3-1848000225f8/dcu5socJLL.json"
-        components.html(f"""
-        <div id="lottie" style=" height: 300px; background: transparent; margin: auto;"></div>
-        <script src="https://cdnjs.cloudflare.com/ajax/libs/lottie-web/5.10.2/lottie.min.js"></script>
-        <script>
-            lottie.loadAnimation({{
-                container: document.getElementById('lottie'),
-                renderer: 'svg',
-                loop: true,
-                autoplay: true,
-                path: '{json2}',
-                rendererSettings: {{
-                    preserveAspectRatio: 'xMidYMid meet',
-                    progressiveLoad: true,
-                    clearCanvas: true
-                }}
-            }});
-        </script>
-        """, height=300)
         st.write("We are dedicated to analyzing and presenting data on unemployment across different countries and regions.")
 
     with col3:
-        st.header("Contact Us")
-        json3 = "https://lottie.host/ccb5e690-be42-48b4-a770-58765f7e8a60/pm5kmrEFLJ.json"
-        components.html(f"""
-        <div id="lottie" style="height: 200px; background: transparent; margin: auto;"></div>
-        <script src="https://cdnjs.cloudflare.com/ajax/libs/lottie-web/5.10.2/lottie.min.js"></script>
-        <script>
-            lottie.loadAnimation({{
-                container: document.getElementById('lottie'),
-                renderer: 'svg',
-                loop: true,
-                autoplay: true,
-                path: '{json3}',
-                rendererSettings: {{
-                    preserveAspectRatio: 'xMidYMid meet',
-                    progressiveLoad: true,
-                    clearCanvas: true
-                }}
-            }});
-        </script>
-        """, height=200)
         st.write("For inquiries, please reach out to us at: info@jobanalysis.com")
 
 
@@ -168,8 +108,8 @@ with st.sidebar:
 
 # -------- PAGE ROUTING --------
 if selected == "Homepage":
-    homepage()
+    run_page(selected, homepage, started_at=SCRIPT_START)
 elif selected == "Global Analysis Dashboard":
-    dashboard_page()
+    run_page(selected, lambda: import_page('dashboard', 'dashboard_page')(), started_at=SCRIPT_START)
 elif selected == "Country Employment Analyzer":
-    analyzer_page()
+    run_page(selected, lambda: import_page('analyzer', 'analyzer_page')(), started_at=SCRIPT_START)
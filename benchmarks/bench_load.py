@@ -0,0 +1,371 @@
+"""Concurrent-session load test of the app over Streamlit's websocket protocol.
+
+Starts ``streamlit run app_hmpg.py`` on a local port (or targets ``--url``) and,
+for each session count N in ``--sessions``, opens N simulated browser sessions
+that replay a user journey for ``--duration`` seconds: load the homepage,
+switch to the dashboard and drag its sliders, switch to the analyzer and click
+through its sections. Every step is a rerun request carrying the widget states
+a browser would send (scoped to the widget's fragment where it has one); its
+latency is the time until the server reports the script run finished.
+
+Reported per N: reruns/s, p50/p95/p99 rerun latency (overall and per step),
+errors, and the server's peak RSS and mean CPU (read from ``/proc``, Linux only,
+for the server this tool starts or ``--pid``).
+
+    python benchmarks/bench_load.py --sessions 1,5,10,25 --duration 30 --output load.json
+
+Requires the ``websockets`` package (``pip install -r benchmarks/requirements.txt``).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WIDGET_TYPES = ('button', 'slider', 'selectbox', 'multiselect', 'component_instance')
+RERUN_TIMEOUT = 120
+PAGES = ('Homepage', 'Global Analysis Dashboard', 'Country Employment Analyzer')
+
+
+class RerunError(RuntimeError):
+    pass
+
+
+class Session:
+    """One simulated browser tab: a websocket plus the widget states it would send."""
+
+    def __init__(self, url):
+        self.url = url
+        self.ws = None
+        self.page_script_hash = ''
+        self.widgets = {}   # key (or component name) -> (widget type, element proto, fragment id)
+        self.states = {}    # widget id -> WidgetState proto sent with every rerun
+
+    async def connect(self):
+        self.ws = await websockets.connect(
+            self.url.replace('http', 'ws', 1).rstrip('/') + '/_stcore/stream',
+            subprotocols=['streamlit'], max_size=None,
+        )
+        await self.rerun()
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    def widget(self, key):
+        try:
+            return self.widgets[key]
+        except KeyError:
+            raise RerunError(f"widget '{key}' is not on the current page") from None
+
+    def _state(self, key):
+        _, proto, _ = self.widget(key)
+        state = BackMsg().rerun_script.widget_states.widgets.add()
+        state.id = proto.id
+        return state
+
+    async def set_value(self, key, value):
+        """Sets a widget's value and reruns, as dragging or picking it in a browser would."""
+        kind, proto, fragment_id = self.widget(key)
+        state = self._state(key)
+        if kind == 'slider':
+            state.double_array_value.data[:] = [value]
+        elif kind == 'selectbox':
+            state.string_value = str(value)
+        elif kind == 'multiselect':
+            state.string_array_value.data[:] = [str(v) for v in value]
+        elif kind == 'component_instance':
+            state.json_value = json.dumps(value)
+        self.states[proto.id] = state
+        return await self.rerun(fragment_id)
+
+    async def click(self, key):
+        _, _, fragment_id = self.widget(key)
+        trigger = self._state(key)
+        trigger.trigger_value = True
+        return await self.rerun(fragment_id, trigger)
+
+    async def rerun(self, fragment_id='', trigger=None):
+        """Sends one rerun request and waits for the run to finish; returns its latency in seconds."""
+        msg = BackMsg()
+        client = msg.rerun_script
+        client.page_script_hash = self.page_script_hash
+        client.fragment_id = fragment_id
+        client.widget_states.widgets.extend(self.states.values())
+        if trigger is not None:
+            client.widget_states.widgets.append(trigger)
+
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        seen, error = {}, None
+        while True:
+            reply = ForwardMsg()
+            reply.ParseFromString(await asyncio.wait_for(self.ws.recv(), RERUN_TIMEOUT))
+            kind = reply.WhichOneof('type')
+            if kind == 'new_session':
+                self.page_script_hash = reply.new_session.page_script_hash
+            elif kind == 'delta' and reply.delta.WhichOneof('type') == 'new_element':
+                element = reply.delta.new_element
+                element_type = element.WhichOneof('type')
+                if element_type == 'exception':
+                    error = element.exception.message
+                elif element_type in WIDGET_TYPES:
+                    proto = getattr(element, element_type)
+                    key = proto.component_name if element_type == 'component_instance' else proto.id.split('-', 2)[-1]
+                    seen[key] = (element_type, proto, reply.delta.fragment_id)
+            elif kind == 'script_finished':
+                break
+        elapsed = time.perf_counter() - start
+
+        if fragment_id:
+            self.widgets.update(seen)
+        else:
+            # A full run redraws the page: widgets that were not drawn are gone
+            self.widgets = seen
+            ids = {proto.id for _, proto, _ in seen.values()}
+            self.states = {wid: state for wid, state in self.states.items() if wid in ids}
+        if error:
+            raise RerunError(error)
+        return elapsed
+
+
+# --- User journey: (step name, coroutine function taking the session) ---
+def _slider_values(session, key, n):
+    _, proto, _ = session.widget(key)
+    return random.sample(range(int(proto.min), int(proto.max) + 1), k=min(n, int(proto.max - proto.min) + 1))
+
+
+def _option(session, key):
+    _, proto, _ = session.widget(key)
+    return random.choice(list(proto.options))
+
+
+async def _dashboard(session, record):
+    record('switch_page', await session.set_value('streamlit_option_menu.option_menu', PAGES[1]))
+    for year in _slider_values(session, 'map_year_slider', 3):
+        record('map_slider', await session.set_value('map_year_slider', year))
+    _, proto, _ = session.widget('bar_country_multi')
+    record('bar_countries', await session.set_value('bar_country_multi', random.sample(list(proto.options), 6)))
+    record('bar_year', await session.set_value('bar_year_select', _option(session, 'bar_year_select')))
+    record('scatter_year', await session.set_value('scatter_year_select', _option(session, 'scatter_year_select')))
+
+
+async def _analyzer(session, record):
+    record('switch_page', await session.set_value('streamlit_option_menu.option_menu', PAGES[2]))
+    await session.set_value('trend_country', _option(session, 'trend_country'))
+    record('trend_button', await session.click('trend_button'))
+    _, proto, _ = session.widget('trend_model')
+    models = list(proto.options)  # 'None' first, then the forecast models
+    await session.set_value('trend_model', random.choice(models[1:]))
+    record('forecast_button', await session.click('trend_button'))
+    await session.set_value('trend_model', models[0])
+    for year in _slider_values(session, 'comp_year', 2):
+        await session.set_value('comp_year', year)
+        record('comparison_button', await session.click('comp_button'))
+    await session.set_value('detail_country', _option(session, 'detail_country'))
+    record('detail_button', await session.click('detail_button'))
+    record('distribution_button', await session.click('dist_button'))
+    record('correlation_button', await session.click('corr_button'))
+    await session.set_value('sim_country', _option(session, 'sim_country'))
+    await session.set_value('sim_metric', _option(session, 'sim_metric'))
+    record('similarity_button', await session.click('sim_button'))
+
+
+async def _homepage(session, record):
+    record('switch_page', await session.set_value('streamlit_option_menu.option_menu', PAGES[0]))
+
+
+JOURNEY = (_dashboard, _analyzer, _homepage)
+
+
+async def simulate_user(url, deadline, think, results):
+    """Replays the journey until ``deadline``, recording ``(step, latency)`` and errors."""
+    session = Session(url)
+
+    def record(step, latency):
+        results['latencies'].append((step, latency))
+
+    try:
+        await session.connect()
+        while time.perf_counter() < deadline:
+            for part in JOURNEY:
+                if time.perf_counter() >= deadline:
+                    break
+                await part(session, record)
+                if think:
+                    await asyncio.sleep(random.uniform(0.5, 1.5) * think)
+    except (RerunError, asyncio.TimeoutError, websockets.WebSocketException, OSError) as e:
+        results['errors'].append(f'{type(e).__name__}: {e}')
+    finally:
+        await session.close()
+
+
+# --- Server process ---
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, log_path):
+    """Starts the app on ``port``, its output going to ``log_path`` so a full pipe never stalls it."""
+    with open(log_path, 'wb') as log:
+        process = subprocess.Popen(
+            [
+                sys.executable, '-m', 'streamlit', 'run', os.path.join(ROOT, 'app_hmpg.py'),
+                '--server.headless', 'true', '--server.port', str(port),
+                '--server.fileWatcherType', 'none', '--browser.gatherUsageStats', 'false',
+            ],
+            cwd=ROOT, stdout=log, stderr=subprocess.STDOUT,
+        )
+    url = f'http://127.0.0.1:{port}'
+    for _ in range(300):
+        if process.poll() is not None:
+            with open(log_path, errors='replace') as log:
+                raise RuntimeError(f"streamlit exited: {log.read()[-2000:]}")
+        try:
+            with urllib.request.urlopen(f'{url}/_stcore/health', timeout=1) as response:
+                if response.status == 200:
+                    return process, url
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"streamlit did not become healthy within 30s (see {log_path})")
+
+
+class ProcessSampler:
+    """Samples a process's RSS and CPU time from /proc while a load level runs."""
+
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.rss_mb = []
+        self._ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+    def _cpu_seconds(self):
+        with open(f'/proc/{self.pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / self._ticks  # utime + stime
+
+    def _rss_mb(self):
+        with open(f'/proc/{self.pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+        return float('nan')
+
+    async def run(self, stop):
+        self.start_cpu, self.start = self._cpu_seconds(), time.perf_counter()
+        while not stop.is_set():
+            self.rss_mb.append(self._rss_mb())
+            try:
+                await asyncio.wait_for(stop.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+        self.end_cpu, self.end = self._cpu_seconds(), time.perf_counter()
+
+    def summary(self):
+        return {
+            'server_peak_rss_mb': round(max(self.rss_mb), 1),
+            'server_cpu_percent': round(100 * (self.end_cpu - self.start_cpu) / (self.end - self.start), 1),
+        }
+
+
+def _percentiles(seconds):
+    ms = np.array(seconds) * 1000
+    return {
+        'count': len(ms),
+        'p50_ms': round(float(np.percentile(ms, 50)), 1),
+        'p95_ms': round(float(np.percentile(ms, 95)), 1),
+        'p99_ms': round(float(np.percentile(ms, 99)), 1),
+    }
+
+
+async def run_level(url, n_sessions, duration, think, pid):
+    results = {'latencies': [], 'errors': []}
+    sampler = ProcessSampler(pid) if pid and os.path.exists(f'/proc/{pid}') else None
+    stop = asyncio.Event()
+    sampling = asyncio.create_task(sampler.run(stop)) if sampler else None
+
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(simulate_user(url, deadline, think, results) for _ in range(n_sessions)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    if sampling:
+        await sampling
+
+    latencies = [latency for _, latency in results['latencies']]
+    level = {
+        'sessions': n_sessions,
+        'duration_s': round(elapsed, 1),
+        'reruns': len(latencies),
+        'reruns_per_s': round(len(latencies) / elapsed, 2),
+        'errors': len(results['errors']),
+        'error_samples': sorted(set(results['errors']))[:5],
+    }
+    if latencies:
+        level.update(_percentiles(latencies))
+        steps = {}
+        for step, latency in results['latencies']:
+            steps.setdefault(step, []).append(latency)
+        level['steps'] = {step: _percentiles(values) for step, values in sorted(steps.items())}
+    if sampler:
+        level.update(sampler.summary())
+    return level
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', default='1,5,10,25', help="Comma-separated concurrent session counts")
+    parser.add_argument('--duration', type=float, default=30, help="Seconds each load level runs")
+    parser.add_argument('--think', type=float, default=1.0, help="Mean think time between journey parts (s)")
+    parser.add_argument('--url', help="Test an already running server instead of starting one")
+    parser.add_argument('--pid', type=int, help="Server PID to sample RSS/CPU for with --url")
+    parser.add_argument('--output', default='load_results.json', help="JSON file to write results to")
+    parser.add_argument('--server-log', default='load_server.log', help="File for the started server's output")
+    args = parser.parse_args(argv)
+
+    levels = [int(n) for n in args.sessions.split(',') if n.strip()]
+    process = None
+    if args.url:
+        url, pid = args.url, args.pid
+    else:
+        process, url = start_server(_free_port(), args.server_log)
+        pid = process.pid
+    try:
+        results = {'url': url, 'think_s': args.think, 'levels': []}
+        for n_sessions in levels:
+            print(f"{n_sessions} session(s) for {args.duration:.0f}s...", file=sys.stderr)
+            level = asyncio.run(run_level(url, n_sessions, args.duration, args.think, pid))
+            results['levels'].append(level)
+            print(
+                f"  {level['reruns_per_s']} reruns/s  p50 {level.get('p50_ms')} ms  p95 {level.get('p95_ms')} ms  "
+                f"p99 {level.get('p99_ms')} ms  errors {level['errors']}  "
+                f"rss {level.get('server_peak_rss_mb')} MB  cpu {level.get('server_cpu_percent')}%",
+                file=sys.stderr,
+            )
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps([{k: v for k, v in level.items() if k != 'steps'} for level in results['levels']], indent=2))
+    return 1 if any(level['errors'] for level in results['levels']) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
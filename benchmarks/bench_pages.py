@@ -0,0 +1,273 @@
+"""Headless rerun benchmarks for the Streamlit pages.
+
+Drives ``app_hmpg.py`` and each page function through
+``streamlit.testing.v1.AppTest`` with scripted widget interactions (year
+slider sweeps, country switches, every analyzer button) and records cold-start
+time, p50/p95 rerun latency and peak Python memory per section.
+
+    python benchmarks/bench_pages.py --output bench.json
+    python benchmarks/bench_pages.py --output new.json --compare bench.json
+
+With ``--compare`` the run exits non-zero if any section's p95 latency grew by
+more than ``--tolerance`` (default 25%) against the baseline file.
+``--sessions N`` also opens N extra concurrent sessions of each scenario and
+reports the Python memory each one retains; with the shared dataset this
+should stay roughly constant rather than grow with the data.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from forecasting import MODELS  # noqa: E402
+from similarity import METRICS  # noqa: E402
+
+TIMEOUT = 120
+
+PAGE_SCRIPT = f"""
+import sys
+sys.path.insert(0, {ROOT!r})
+from {{module}} import {{page}}
+{{page}}()
+"""
+
+
+def page_app(module, page):
+    return AppTest.from_string(PAGE_SCRIPT.format(module=module, page=page), default_timeout=TIMEOUT)
+
+
+def homepage_app():
+    return AppTest.from_file(os.path.join(ROOT, 'app_hmpg.py'), default_timeout=TIMEOUT)
+
+
+# --- Scripted interactions: each step mutates widgets on ``at`` and reruns it ---
+def dashboard_sections(at):
+    # The map slider also covers projected years; the selectboxes only list years with data
+    map_years = at.slider(key='map_year_slider')
+    first, last = int(map_years.min), int(map_years.max)
+    bar_years = [int(y) for y in at.selectbox(key='bar_year_select').options]
+    scatter_years = [int(y) for y in at.selectbox(key='scatter_year_select').options]
+    countries = list(at.multiselect(key='bar_country_multi').options)
+    return {
+        'map': [lambda at, y=y: at.slider(key='map_year_slider').set_value(y).run() for y in range(first, last + 1)],
+        'bar': [
+            lambda at, i=i: at.multiselect(key='bar_country_multi').set_value(countries[i:i + 6]).run()
+            for i in range(0, min(len(countries), 60), 6)
+        ] + [
+            lambda at, y=y: at.selectbox(key='bar_year_select').set_value(y).run() for y in bar_years
+        ],
+        'scatter': [lambda at, y=y: at.selectbox(key='scatter_year_select').set_value(y).run() for y in scatter_years],
+    }
+
+
+def analyzer_sections(at):
+    countries = list(at.selectbox(key='trend_country').options)[:15]
+    years = at.slider(key='comp_year')
+    first, last = int(years.min), int(years.max)
+
+    def trend(at, country):
+        at.selectbox(key='trend_country').set_value(country)
+        at.button(key='trend_button').click().run()
+
+    def comparison(at, year):
+        at.slider(key='comp_year').set_value(year)
+        at.button(key='comp_button').click().run()
+
+    def forecast(at, country, model):
+        at.selectbox(key='trend_country').set_value(country)
+        at.selectbox(key='trend_model').set_value(model)
+        at.button(key='trend_button').click().run()
+
+    def similar(at, country, metric):
+        at.selectbox(key='sim_country').set_value(country)
+        at.selectbox(key='sim_metric').set_value(metric)
+        at.button(key='sim_button').click().run()
+
+    def detail(at, country):
+        at.selectbox(key='detail_country').set_value(country)
+        at.button(key='detail_button').click().run()
+
+    def distribution(at, year):
+        at.slider(key='dist_year').set_value(year)
+        at.button(key='dist_button').click().run()
+
+    return {
+        'trend': [lambda at, c=c: trend(at, c) for c in countries],
+        'comparison': [lambda at, y=y: comparison(at, y) for y in range(first, last + 1)],
+        'detail': [lambda at, c=c: detail(at, c) for c in countries],
+        'distribution': [lambda at, y=y: distribution(at, y) for y in range(first, last + 1)],
+        'correlation': [lambda at: at.button(key='corr_button').click().run()] * 5,
+        'forecast': [lambda at, c=c, m=m: forecast(at, c, m) for m in MODELS for c in countries[:5]],
+        'similarity': [lambda at, c=c, m=m: similar(at, c, m) for m in METRICS for c in countries[:5]],
+    }
+
+
+SCENARIOS = {
+    'homepage': (homepage_app, None),
+    'dashboard': (lambda: page_app('dashboard', 'dashboard_page'), dashboard_sections),
+    'analyzer': (lambda: page_app('analyzer', 'analyzer_page'), analyzer_sections),
+}
+
+
+def clear_caches(drop_disk_cache=False):
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    if drop_disk_cache:
+        for suffix in ('.arrow', '.parquet', '.cube.npz'):
+            path = os.path.join(ROOT, 'global_unemployment_data' + suffix)
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def check(at, label):
+    if at.exception:
+        raise RuntimeError(f"{label} raised: {at.exception[0].message}")
+
+
+def run_scenario(name, drop_disk_cache=False, repeat=1):
+    make_app, sections = SCENARIOS[name]
+    clear_caches(drop_disk_cache)
+
+    at = make_app()
+    start = time.perf_counter()
+    at.run()
+    cold_start = time.perf_counter() - start
+    check(at, name)
+
+    start = time.perf_counter()
+    at.run()
+    warm_rerun = time.perf_counter() - start
+
+    result = {'cold_start_s': round(cold_start, 4), 'warm_rerun_ms': round(warm_rerun * 1000, 2), 'sections': {}}
+    if sections is None:
+        return result
+
+    for section, steps in sections(at).items():
+        # Timing pass (no tracing overhead)
+        latencies = []
+        for _ in range(repeat):
+            for step in steps:
+                start = time.perf_counter()
+                step(at)
+                latencies.append(time.perf_counter() - start)
+                check(at, f'{name}.{section}')
+
+        # Memory pass over the same steps
+        tracemalloc.start()
+        for step in steps:
+            step(at)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        ms = np.array(latencies) * 1000
+        result['sections'][section] = {
+            'reruns': len(latencies),
+            'mean_ms': round(float(ms.mean()), 2),
+            'p50_ms': round(float(np.percentile(ms, 50)), 2),
+            'p95_ms': round(float(np.percentile(ms, 95)), 2),
+            'peak_mem_mb': round(peak / 2**20, 2),
+        }
+    return result
+
+
+def session_memory(name, sessions):
+    """Python memory retained per additional concurrent session of a scenario."""
+    make_app, _ = SCENARIOS[name]
+    clear_caches()
+    first = make_app()
+    first.run()
+    check(first, name)
+
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    apps = []
+    for _ in range(sessions):
+        at = make_app()
+        at.run()
+        check(at, name)
+        apps.append(at)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'sessions': sessions, 'per_session_kb': round((retained - baseline) / sessions / 1024, 1)}
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'streamlit': st.__version__,
+        'platform': platform.platform(),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Prints per-section p95 changes; returns the list of regressions."""
+    regressions = []
+    for scenario, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(scenario)
+        if not previous:
+            continue
+        for section, stats in current['sections'].items():
+            old = previous['sections'].get(section)
+            if not old or not old['p95_ms']:
+                continue
+            change = stats['p95_ms'] / old['p95_ms'] - 1
+            flag = ' REGRESSION' if change > tolerance else ''
+            print(f"{scenario}.{section}: p95 {old['p95_ms']:.1f} -> {stats['p95_ms']:.1f} ms ({change:+.0%}){flag}")
+            if flag:
+                regressions.append(f'{scenario}.{section}')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', default='bench_results.json', help="JSON file to write results to")
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS), help="Run only these scenarios")
+    parser.add_argument('--repeat', type=int, default=3, help="Times each section's interaction script is replayed")
+    parser.add_argument('--cold', action='store_true', help="Delete on-disk dataset caches before each scenario")
+    parser.add_argument('--compare', metavar='BASELINE', help="Baseline JSON to compare p95 latencies against")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed relative p95 increase with --compare")
+    parser.add_argument('--sessions', type=int, default=0, help="Also measure memory retained per extra concurrent session")
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT)
+    results = {'environment': environment(), 'scenarios': {}}
+    for name in args.scenario or list(SCENARIOS):
+        print(f"Running {name}...", file=sys.stderr)
+        results['scenarios'][name] = run_scenario(name, drop_disk_cache=args.cold, repeat=args.repeat)
+        if args.sessions:
+            results['scenarios'][name]['session_memory'] = session_memory(name, args.sessions)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results['scenarios'], indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
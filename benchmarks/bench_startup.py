@@ -0,0 +1,88 @@
+"""Startup cost report for the app: homepage first paint and deferred page imports.
+
+Each measurement runs in a fresh Python process so module imports are not
+already cached:
+
+- ``homepage``: first ``AppTest`` run of ``app_hmpg.py`` (the homepage route),
+  which heavy plotting libraries it imported and the process peak RSS.
+- ``dashboard`` / ``analyzer``: the cost of importing that page module after the
+  homepage has rendered, i.e. what the first visit to the route pays.
+
+    python benchmarks/bench_startup.py --output startup.json
+"""
+import argparse
+import importlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('plotly', 'seaborn', 'matplotlib', 'scipy')
+PAGE_MODULES = ('dashboard', 'analyzer')
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (2**20 if sys.platform == 'darwin' else 2**10), 1)
+
+
+def measure(target):
+    """Runs in the child process; returns the measurement for ``target``."""
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    from streamlit.testing.v1 import AppTest
+
+    baseline = set(sys.modules)
+    at = AppTest.from_file(os.path.join(ROOT, 'app_hmpg.py'), default_timeout=120)
+    start = time.perf_counter()
+    at.run()
+    homepage_s = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    result = {
+        'homepage_first_run_s': round(homepage_s, 4),
+        'heavy_modules_on_homepage': sorted(m for m in HEAVY_MODULES if m in set(sys.modules) - baseline),
+    }
+    if target != 'homepage':
+        start = time.perf_counter()
+        importlib.import_module(target)
+        result['page_import_s'] = round(time.perf_counter() - start, 4)
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', default='startup_results.json', help="JSON file to write results to")
+    parser.add_argument('--runs', type=int, default=3, help="Fresh processes per target (best run is kept)")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(measure(args.child)))
+        return 0
+
+    results = {}
+    for target in ('homepage',) + PAGE_MODULES:
+        runs = []
+        for _ in range(args.runs):
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', target],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            runs.append(json.loads(out.strip().splitlines()[-1]))
+        key = 'page_import_s' if target != 'homepage' else 'homepage_first_run_s'
+        results[target] = min(runs, key=lambda r: r[key])
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""Binary columnar (Arrow IPC) cache of the tidy dataset, stored next to the CSV.
+
+The first load parses the CSV and writes ``<name>.arrow`` beside it. Later loads
+memory-map that file instead of parsing text. The CSV's size, mtime and SHA-256
+are kept in the Arrow schema metadata: a size/mtime match is trusted as is, and
+otherwise the content hash decides whether the cache is stale, so touching the
+CSV without editing it does not force a rebuild.
+"""
+import hashlib
+import logging
+import os
+
+import numpy as np
+import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+# Bump when the tidy layout changes so old cache files are rebuilt
+FORMAT_VERSION = '1'
+
+
+def cache_path(csv_path):
+    return os.path.splitext(csv_path)[0] + '.arrow'
+
+
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read(csv_path):
+    """Returns ``(frame, sha256)`` from the cache, or ``None`` if it is missing or stale."""
+    path = cache_path(csv_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    except (OSError, pa.ArrowInvalid) as e:
+        logger.warning("Ignoring unreadable columnar cache %s: %s", path, e)
+        return None
+
+    meta = decode_metadata(table.schema.metadata)
+    if not is_fresh(meta, csv_path):
+        return None
+    return table.to_pandas(split_blocks=True), meta['csv_sha256']
+
+
+def source_metadata(csv_path, sha256=None):
+    """Metadata identifying the exact CSV a derived file was built from."""
+    stat = os.stat(csv_path)
+    return {
+        'format_version': FORMAT_VERSION,
+        'csv_size': str(stat.st_size),
+        'csv_mtime_ns': str(stat.st_mtime_ns),
+        'csv_sha256': sha256 or file_hash(csv_path),
+    }
+
+
+def decode_metadata(metadata):
+    return {k.decode(): v.decode() for k, v in (metadata or {}).items()}
+
+
+def is_fresh(meta, csv_path):
+    """Whether ``meta`` (see ``source_metadata``) still describes the CSV on disk."""
+    if meta.get('format_version') != FORMAT_VERSION:
+        return False
+    stat = os.stat(csv_path)
+    if meta.get('csv_size') != str(stat.st_size):
+        return False
+    return meta.get('csv_mtime_ns') == str(stat.st_mtime_ns) or meta.get('csv_sha256') == file_hash(csv_path)
+
+
+def _to_table(frame, metadata=None):
+    columns = {}
+    for col in frame.columns:
+        series = frame[col]
+        if isinstance(series.dtype, np.dtype):
+            # Plain NumPy columns keep NaN as a value (no null bitmap), so they
+            # can be mapped back without conversion
+            columns[col] = pa.array(series.to_numpy())
+        else:
+            columns[col] = pa.Array.from_pandas(series)
+    return pa.table(columns, metadata=metadata)
+
+
+def publish(frame, csv_path, sha256=None):
+    """Writes ``frame`` to the cache and returns ``(shared_frame, sha256)``.
+
+    ``shared_frame`` is mapped back from the cache file, so its columns are
+    read-only views of the OS page cache: every session of this process and
+    every other process reading the same cache share one physical copy, and
+    writing into it raises instead of silently changing what other sessions
+    see. If the cache cannot be written the frame is still handed out as
+    read-only Arrow-backed columns.
+    """
+    sha256 = write(frame, csv_path, sha256)
+    cached = read(csv_path)
+    if cached is not None:
+        return cached
+    return _to_table(frame).to_pandas(split_blocks=True), sha256
+
+
+def write(frame, csv_path, sha256=None):
+    """Writes ``frame`` to the cache file atomically and returns the CSV's SHA-256.
+
+    Failing to write (e.g. a read-only data directory) only logs a warning.
+    """
+    metadata = source_metadata(csv_path, sha256)
+    table = _to_table(frame, metadata)
+
+    path = cache_path(csv_path)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("Could not write columnar cache %s: %s", path, e)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return metadata['csv_sha256']
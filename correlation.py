@@ -0,0 +1,173 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+class RunningCorrelation:
+    """Pairwise-complete Pearson correlation between columns, kept as running sums.
+
+    For every column pair (i, j) only the rows where both values are present
+    contribute. The sums are stored as (n_cols, n_cols) matrices:
+
+    - ``n[i, j]``   number of rows with both values
+    - ``sx[i, j]``  sum of column i over those rows (column j's sum is ``sx[j, i]``)
+    - ``sxx[i, j]`` sum of squares of column i over those rows
+    - ``sxy[i, j]`` sum of products
+
+    so adding rows or columns only costs the new data, and ``matrix()`` is a
+    handful of element-wise operations on (n_cols, n_cols) arrays.
+    """
+
+    def __init__(self, n_cols=0):
+        self.n = np.zeros((n_cols, n_cols))
+        self.sx = np.zeros((n_cols, n_cols))
+        self.sxx = np.zeros((n_cols, n_cols))
+        self.sxy = np.zeros((n_cols, n_cols))
+
+    @classmethod
+    def from_rows(cls, values):
+        return cls(values.shape[1]).add_rows(values)
+
+    def copy(self):
+        other = RunningCorrelation()
+        other.n, other.sx, other.sxx, other.sxy = self.n.copy(), self.sx.copy(), self.sxx.copy(), self.sxy.copy()
+        return other
+
+    def add_rows(self, values):
+        """Adds rows of a (rows, n_cols) array with NaN for missing values; returns ``self``."""
+        present = ~np.isnan(values)
+        mask = present.astype(np.float64)
+        filled = np.where(present, values, 0.0).astype(np.float64)
+        self.n += mask.T @ mask
+        self.sx += filled.T @ mask
+        self.sxx += (filled * filled).T @ mask
+        self.sxy += filled.T @ filled
+        return self
+
+    def add_columns(self, values, n_new):
+        """Appends the last ``n_new`` columns of ``values`` (all rows seen so far, all columns).
+
+        Only the blocks that involve a new column are computed.
+        """
+        n_old = self.n.shape[0]
+        present = ~np.isnan(values)
+        mask = present.astype(np.float64)
+        filled = np.where(present, values, 0.0).astype(np.float64)
+        new = slice(n_old, n_old + n_new)
+
+        for name in ('n', 'sx', 'sxx', 'sxy'):
+            setattr(self, name, np.pad(getattr(self, name), ((0, n_new), (0, n_new))))
+        pairs = {
+            'n': (mask, mask),
+            'sx': (filled, mask),
+            'sxx': (filled * filled, mask),
+            'sxy': (filled, filled),
+        }
+        for name, (left, right) in pairs.items():
+            matrix = getattr(self, name)
+            matrix[new, :] = left[:, new].T @ right
+            matrix[:, new] = left.T @ right[:, new]
+        return self
+
+    def matrix(self):
+        """The correlation matrix; NaN where fewer than two rows overlap or a column is constant."""
+        n, sx, sy = self.n, self.sx, self.sx.T
+        cov = n * self.sxy - sx * sy
+        var_x = n * self.sxx - sx * sx
+        var_y = n * self.sxx.T - sy * sy
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = cov / np.sqrt(var_x * var_y)
+        corr[(n < 2) | (var_x <= 0) | (var_y <= 0)] = np.nan
+        return np.clip(corr, -1.0, 1.0)
+
+
+class YearCorrelations:
+    """Year-by-year correlation of the per-series rates in an ``AggregateCube``.
+
+    A series is one (country, sex, age_group) cell. ``matrix()`` covers all
+    series; ``matrix('sex', 'Female')`` or ``matrix('age_group', '15-24')``
+    restrict it to a subgroup. The overall matrix is built up front and
+    subgroup matrices on first request; ``updated()`` carries all of them over
+    to a grown cube incrementally.
+    """
+
+    SUBGROUP_AXES = {'sex': 1, 'age_group': 2}
+
+    def __init__(self, cube, engines=None):
+        self.cube = cube
+        self._engines = engines if engines is not None else {None: RunningCorrelation.from_rows(self._rows(cube))}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def _rows(cls, cube, group=None):
+        cells = cube.cells
+        if group is not None:
+            col, value = group
+            axis = cls.SUBGROUP_AXES[col]
+            labels = cube.sexes if col == 'sex' else cube.age_groups
+            cells = np.take(cells, [labels.get_loc(value)], axis=axis)
+        return cells.reshape(-1, cells.shape[-1])
+
+    def _engine(self, group):
+        engine = self._engines.get(group)
+        if engine is None:
+            with self._lock:
+                engine = self._engines.get(group)
+                if engine is None:
+                    engine = self._engines[group] = RunningCorrelation.from_rows(self._rows(self.cube, group))
+        return engine
+
+    def matrix(self, by=None, value=None):
+        """Returns the correlation matrix as a DataFrame indexed by year on both axes."""
+        engine = self._engine(None if by is None else (by, value))
+        return pd.DataFrame(engine.matrix(), index=self.cube.years, columns=self.cube.years)
+
+    def subgroups(self):
+        """``(by, value)`` pairs accepted by ``matrix``."""
+        return [('sex', sex) for sex in self.cube.sexes] + [('age_group', age) for age in self.cube.age_groups]
+
+    def updated(self, cube):
+        """Returns correlations for ``cube``, a grown version of ``self.cube``.
+
+        New years are added as columns and new series as rows. If the values
+        of existing series in existing years changed (not an append), or the
+        years are not a strict extension, everything is rebuilt.
+        """
+        old = self.cube
+        n_old_years = len(old.years)
+        if not np.array_equal(cube.years[:n_old_years], old.years):
+            return YearCorrelations(cube)
+
+        # Position of each old label along the new cube's axes
+        positions = [
+            new_labels.get_indexer(old_labels)
+            for new_labels, old_labels in ((cube.countries, old.countries), (cube.sexes, old.sexes), (cube.age_groups, old.age_groups))
+        ]
+        existing = cube.cells[np.ix_(*positions, np.arange(n_old_years))]
+        if not np.array_equal(existing, old.cells, equal_nan=True):
+            return YearCorrelations(cube)
+
+        is_new = np.ones(cube.cells.shape[:3], dtype=bool)
+        is_new[np.ix_(*positions)] = False
+        n_new_years = len(cube.years) - n_old_years
+
+        engines = {}
+        for group, engine in self._engines.items():
+            engine = engine.copy()
+            rows = self._rows(cube, group)
+            new_rows = self._rows_mask(is_new, group, cube)
+            if n_new_years:
+                engine.add_columns(rows[~new_rows], n_new_years)
+            if new_rows.any():
+                engine.add_rows(rows[new_rows])
+            engines[group] = engine
+        return YearCorrelations(cube, engines)
+
+    @classmethod
+    def _rows_mask(cls, is_new, group, cube):
+        if group is not None:
+            col, value = group
+            labels = cube.sexes if col == 'sex' else cube.age_groups
+            is_new = np.take(is_new, [labels.get_loc(value)], axis=cls.SUBGROUP_AXES[col])
+        return is_new.reshape(-1)
@@ -0,0 +1,43 @@
+"""Country name to ISO 3166-1 alpha-3 resolution.
+
+Names are matched against ``country_codes.csv`` (ISO short names, common
+names and the aliases our sources use, e.g. 'Hong Kong, China') after
+folding case, accents and punctuation. Charts then locate countries by code
+instead of leaving Plotly to match names in the browser, where names it does
+not know are dropped without a trace.
+"""
+import csv
+import functools
+import logging
+import os
+import re
+import unicodedata
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CODES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'country_codes.csv')
+
+
+def normalize(name):
+    """Folds case, accents, '&' and punctuation: "Côte d'Ivoire" -> 'cote d ivoire'."""
+    name = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^a-z0-9]+', ' ', name.casefold().replace('&', ' and ')).strip()
+
+
+@functools.lru_cache(maxsize=None)
+def _lookup():
+    with open(CODES_FILE, newline='', encoding='utf-8') as f:
+        return {normalize(row['name']): row['iso3'] for row in csv.DictReader(f)}
+
+
+def resolve(names):
+    """Returns ``(codes, unmatched)``: an object array of ISO-3 codes (None where
+    unmatched) aligned with ``names``, and the list of names that did not match."""
+    lookup = _lookup()
+    codes = np.array([lookup.get(normalize(name)) for name in names], dtype=object)
+    unmatched = [name for name, code in zip(names, codes) if code is None]
+    if unmatched:
+        logger.warning("No ISO-3 code for %d name(s), left off the map: %s", len(unmatched), ', '.join(unmatched))
+    return codes, unmatched
@@ -0,0 +1,337 @@
+import hashlib
+import io
+import logging
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import columnar_cache
+from profiling import stage
+from aggregates import AggregateCube, CubeAccumulator
+from correlation import YearCorrelations
+from distributions import YearDistributions
+
+logger = logging.getLogger(__name__)
+
+DATA_FILE = 'global_unemployment_data.csv'
+
+# Descriptive columns that repeat for every year; stored as categoricals
+ID_VARS = ['country_name', 'indicator_name', 'sex', 'age_group', 'age_categories']
+
+# Filter combinations used by the pages; each gets a precomputed row-offset lookup
+SLICE_KEYS = [
+    ('country_name', 'sex', 'age_group'),  # trend over time
+    ('year', 'sex', 'age_group'),          # cross-country comparisons
+    ('country_name', 'year'),              # per-country breakdowns
+    ('year',),                             # whole-year slices
+]
+
+
+def year_columns(df):
+    """Returns the per-year value columns of the wide table (e.g. '2014' ... '2024')."""
+    return [col for col in df.columns if str(col).isdigit()]
+
+
+def tidy(df):
+    """Melts the wide table into long format with compact dtypes.
+
+    The id columns become categoricals before melting so the repeated labels
+    are stored as small integer codes, years become int16 and rates float32.
+    """
+    value_vars = year_columns(df)
+    df = df.astype({col: 'category' for col in ID_VARS})
+    df = df.astype({col: 'float32' for col in value_vars})
+    df_melted = pd.melt(df, id_vars=ID_VARS, value_vars=value_vars, var_name='year', value_name='unemployment_rate')
+    df_melted['year'] = df_melted['year'].astype('int16')
+    return df_melted
+
+
+def concat_tidy(frames):
+    """Concatenates tidy frames, merging the categories of their id columns."""
+    frames = list(frames)
+    dtypes = {
+        col: pd.CategoricalDtype(sorted(set().union(*(f[col].cat.categories for f in frames))))
+        for col in ID_VARS
+    }
+    return pd.concat([f.astype(dtypes) for f in frames], ignore_index=True)
+
+
+def read_only(*arrays):
+    """Marks NumPy arrays shared between sessions read-only; returns the first one."""
+    for array in arrays:
+        array.flags.writeable = False
+    return arrays[0]
+
+
+class SliceIndex:
+    """Row positions of every group of the ``keys`` columns, as one sorted permutation.
+
+    Each row gets a group code from the categorical codes of its key columns
+    (years are coded against their sorted distinct values). ``order`` lists
+    the row positions sorted by group, keeping table order within a group;
+    ``groups`` holds the distinct group codes and ``starts`` where each
+    group's run of ``order`` begins. Resolving a filter is a label lookup, a
+    ``searchsorted`` and a slice, and the index is a few integer arrays no
+    matter how many groups there are.
+    """
+
+    def __init__(self, frame, keys):
+        self.keys = keys
+        self.labels, codes = [], []
+        for col in keys:
+            series = frame[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                labels, col_codes = series.cat.categories, series.cat.codes.to_numpy()
+            else:
+                values = series.to_numpy()
+                labels = pd.Index(np.unique(values))
+                col_codes = labels.get_indexer(values)
+            self.labels.append(labels)
+            codes.append(col_codes.astype(np.int64))
+        self.dims = tuple(len(labels) for labels in self.labels)
+
+        # Rows with a missing label are in no group, as with groupby
+        present = np.logical_and.reduce([col_codes >= 0 for col_codes in codes])
+        rows = np.flatnonzero(present)
+        group = np.ravel_multi_index([col_codes[present] for col_codes in codes], self.dims)
+        permutation = np.argsort(group, kind='stable')
+        self.order = rows[permutation].astype(np.int32)
+        self.groups, starts = np.unique(group[permutation], return_index=True)
+        self.starts = np.append(starts, len(permutation))
+        read_only(self.order, self.groups, self.starts)
+
+    def rows(self, values):
+        """Row positions of the group with ``values`` (one per key column), or None."""
+        try:
+            codes = [labels.get_loc(value) for labels, value in zip(self.labels, values)]
+        except (KeyError, TypeError):
+            return None
+        group = np.ravel_multi_index(codes, self.dims)
+        i = int(np.searchsorted(self.groups, group))
+        if i == len(self.groups) or self.groups[i] != group:
+            return None
+        return self.order[self.starts[i]:self.starts[i + 1]]
+
+
+def _row_offsets(frame):
+    return {keys: SliceIndex(frame, keys) for keys in SLICE_KEYS}
+
+
+class TidyData:
+    """The tidy table plus a ``SliceIndex`` for every filter combination in SLICE_KEYS.
+
+    ``select(country_name=..., sex=..., age_group=..., year=...)`` resolves a
+    filter with a ``searchsorted`` lookup and a ``take`` of the matching rows,
+    so the cost depends on the size of the slice rather than the size of the
+    table.
+
+    One instance is shared by every session of the process (see
+    ``load_data``), so it is never modified: the frame comes from the
+    read-only Arrow mapping, the derived arrays are flagged read-only, and
+    appends build a new instance (``extend``).
+    """
+
+    def __init__(self, frame, version=None, offsets=None, cube=None, correlations=None, distributions=None):
+        self.frame = frame
+        self.version = version
+        with stage('index'):
+            self.offsets = offsets if offsets is not None else _row_offsets(frame)
+        with stage('cube'):
+            self.cube = cube if cube is not None else AggregateCube.from_frame(frame)
+        with stage('correlation'):
+            self.correlations = correlations if correlations is not None else YearCorrelations(self.cube)
+        with stage('distribution'):
+            self.distributions = distributions if distributions is not None else YearDistributions.from_frame(
+                frame, self.cube.years, self.cube.sexes, self.cube.age_groups,
+            )
+
+    def extend(self, delta, version=None):
+        """Returns a new ``TidyData`` with the tidy rows in ``delta`` appended.
+
+        Only the new rows are aggregated; existing cube sums, correlation sums
+        and the distributions of untouched years are reused, and ``self`` is
+        left untouched for readers still using it. The slice indexes are
+        rebuilt, which is a vectorized sort per key combination.
+        """
+        cube = CubeAccumulator.from_cube(self.cube).add(delta).to_cube()
+        correlations = self.correlations.updated(cube)
+        frame = concat_tidy([self.frame, delta])
+        distributions = self.distributions.updated(frame, cube, delta['year'].unique())
+        return TidyData(frame, version, None, cube, correlations, distributions)
+
+    def select(self, **filters):
+        """Returns the rows matching all ``column=value`` filters."""
+        for keys, index in self.offsets.items():
+            if set(keys) == set(filters):
+                rows = index.rows([filters[col] for col in keys])
+                if rows is None:
+                    return self.frame.iloc[:0]
+                return self.frame.take(rows)
+        # Unindexed combination: fall back to a full-table mask
+        mask = np.ones(len(self.frame), dtype=bool)
+        for col, value in filters.items():
+            mask &= (self.frame[col] == value).to_numpy()
+        return self.frame[mask]
+
+
+def load_tidy(file_path=DATA_FILE):
+    """Returns ``(frame, version)`` for the CSV, preferring its memory-mapped columnar cache.
+
+    The frame's columns are read-only (see ``columnar_cache.publish``).
+    ``version`` is the SHA-256 of the CSV the frame was built from.
+    """
+    with stage('columnar_cache.read'):
+        cached = columnar_cache.read(file_path)
+    if cached is not None:
+        return cached
+    with stage('csv.read'):
+        wide = pd.read_csv(file_path)
+    with stage('melt'):
+        frame = tidy(wide)
+    with stage('columnar_cache.write'):
+        return columnar_cache.publish(frame, file_path)
+
+
+def _match_rows(frame, ids):
+    """Matches the id rows of the wide CSV to the id tuples of the tidy ``frame``.
+
+    Returns ``(wide_rows, tidy_rows)``: the number of the id tuple of every
+    wide row (-1 when ``frame`` does not have it) and of every tidy row.
+    Labels are compared through ``frame``'s categorical codes, so no strings
+    are built or sorted.
+    """
+    tidy_codes, wide_codes, dims = [], [], []
+    for col in ID_VARS:
+        categories = frame[col].cat.categories
+        # Shifted by one so a missing label (code -1) gets its own slot
+        tidy_codes.append(frame[col].cat.codes.to_numpy().astype(np.int64) + 1)
+        codes = categories.get_indexer(ids[col]) + 1
+        wide_codes.append(np.where((codes == 0) & ids[col].notna().to_numpy(), -1, codes))
+        dims.append(len(categories) + 1)
+    tidy_rows, keys = pd.factorize(np.ravel_multi_index(tidy_codes, dims))
+    known = np.logical_and.reduce([codes >= 0 for codes in wide_codes])
+    wide_keys = np.full(len(ids), -1, dtype=np.int64)
+    wide_keys[known] = np.ravel_multi_index([codes[known] for codes in wide_codes], dims)
+    return pd.Index(keys).get_indexer(wide_keys), tidy_rows
+
+
+def refresh(data, file_path=DATA_FILE):
+    """Applies year columns and rows appended to the CSV since ``data`` was loaded.
+
+    The CSV is read and parsed once; only the new year columns and the new
+    rows are melted and aggregated. The known year values of the existing
+    rows are compared with the loaded ones as one float32 block, aligned by
+    id codes. Returns ``None`` when the change is not append-only (rows
+    removed, years dropped, or existing values edited in place, also when
+    rows or years were appended in the same save), in which case the caller
+    should do a full reload.
+    """
+    if not isinstance(data, TidyData):
+        return None
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+    wide = pd.read_csv(io.BytesIO(raw))
+    file_years = {int(col): col for col in year_columns(wide)}
+    known_years = data.cube.years.tolist()
+    if not set(known_years) <= set(file_years):
+        return None
+    new_years = [col for year, col in file_years.items() if year not in set(known_years)]
+
+    wide_rows, tidy_rows = _match_rows(data.frame, wide[ID_VARS])
+    is_new = wide_rows < 0
+    old_rows = wide_rows[~is_new]
+    n_tuples = int(tidy_rows.max()) + 1 if len(tidy_rows) else 0
+    if len(old_rows) != n_tuples or len(np.unique(old_rows)) != n_tuples or not (new_years or is_new.any()):
+        return None
+
+    # Appending and editing in the same save: the edits are only seen by a full reload
+    loaded = np.full((n_tuples, len(known_years)), np.nan, dtype=np.float32)
+    loaded[tidy_rows, np.searchsorted(data.cube.years, data.frame['year'].to_numpy())] = data.frame['unemployment_rate'].to_numpy()
+    current = wide.loc[~is_new, [file_years[year] for year in known_years]].to_numpy(dtype=np.float32)
+    if not np.array_equal(loaded[old_rows], current, equal_nan=True):
+        return None
+
+    parts = []
+    if is_new.any():
+        parts.append(tidy(wide[is_new]))
+    if new_years:
+        parts.append(tidy(wide.loc[~is_new, ID_VARS + new_years]))
+    delta = concat_tidy(parts) if len(parts) > 1 else parts[0]
+
+    version = hashlib.sha256(raw).hexdigest()
+    refreshed = data.extend(delta, version)
+    # Swap the concatenated frame for the shared read-only mapping of the new cache
+    frame, version = columnar_cache.publish(refreshed.frame, file_path, version)
+    return TidyData(
+        frame, version, refreshed.offsets, refreshed.cube, refreshed.correlations, refreshed.distributions,
+    )
+
+
+def _signature(file_path):
+    stat = os.stat(file_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _full_load(file_path):
+    import streaming
+    if streaming.enabled(file_path):
+        return streaming.open_store(file_path)
+    frame, version = load_tidy(file_path)
+    return TidyData(frame, version)
+
+
+class DatasetWatcher:
+    """Holds the current dataset for one CSV and refreshes it when the file changes.
+
+    Every ``get()`` stats the file. When its size or mtime moved, one caller
+    applies the appended delta (see ``refresh``), falling back to a full reload,
+    while concurrent callers keep getting the previous dataset instead of
+    waiting for the refresh to finish.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.signature = _signature(file_path)
+        self.data = _full_load(file_path)
+        self._lock = threading.Lock()
+
+    def changed(self):
+        """Whether the file moved since the current dataset was loaded (one ``stat``)."""
+        return _signature(self.file_path) != self.signature
+
+    def get(self):
+        signature = _signature(self.file_path)
+        if signature != self.signature and self._lock.acquire(blocking=False):
+            try:
+                if signature != self.signature:
+                    try:
+                        data = refresh(self.data, self.file_path)
+                    except (ValueError, KeyError, pd.errors.ParserError) as e:
+                        logger.warning("Incremental refresh of %s failed, reloading: %s", self.file_path, e)
+                        data = None
+                    self.data = data if data is not None else _full_load(self.file_path)
+                    self.signature = signature
+            finally:
+                self._lock.release()
+        return self.data
+
+
+@st.cache_resource
+def _watcher(file_path):
+    return DatasetWatcher(file_path)
+
+
+def load_data(file_path=DATA_FILE):
+    """Returns the indexed tidy table shared by all pages.
+
+    Large files come back as a ``streaming.StreamedData`` instead, which has the
+    same ``select``/``cube``/``correlations``/``version`` interface but keeps
+    rows on disk.
+
+    Rows or year columns appended to the CSV are picked up on the next rerun
+    without reloading everything (see ``DatasetWatcher``).
+    """
+    return _watcher(file_path).get()
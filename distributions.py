@@ -0,0 +1,162 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Histogram and smoothed curve of one group, ready to draw; ``kde_y`` is None
+# when the group has fewer than two distinct values
+Distribution = namedtuple('Distribution', ['edges', 'counts', 'kde_x', 'kde_y'])
+
+
+class YearDistributions:
+    """Per-year histograms and KDE curves of the unemployment rate.
+
+    Mirrors ``sns.histplot(rates, bins=BINS, kde=True)``: equal-width bins over
+    the data range and a Gaussian KDE with Scott's bandwidth evaluated on
+    ``GRIDSIZE`` points over the same range, scaled to the histogram counts.
+    Groups are every year, plus every (year, sex) and (year, age_group). They
+    are all computed at load time with two passes of vectorized ``bincount``
+    over the rows, so the work does not depend on how many groups there are.
+    The KDE is evaluated from a ``FINE_BINS``-bin histogram rather than from
+    the raw samples, which makes it independent of the group size.
+
+    Each group costs ``BINS`` counts, ``BINS + 1`` edges and ``GRIDSIZE`` curve
+    values, stored as stacked float32/int32 arrays.
+    """
+
+    BINS = 30
+    GRIDSIZE = 200
+    FINE_BINS = 1024
+
+    def __init__(self, keys, edges, counts, kde):
+        self.keys = keys
+        self.edges = edges
+        self.counts = counts
+        self.kde = kde
+        for array in (edges, counts, kde):
+            array.flags.writeable = False
+        self._index = {key: i for i, key in enumerate(keys)}
+
+    @staticmethod
+    def _keys(years, sexes, age_groups):
+        return (
+            [(int(y), None, None) for y in years]
+            + [(int(y), 'sex', s) for y in years for s in sexes]
+            + [(int(y), 'age_group', a) for y in years for a in age_groups]
+        )
+
+    @classmethod
+    def from_frame(cls, frame, years, sexes, age_groups):
+        return cls.from_chunks(lambda: [frame], years, sexes, age_groups)
+
+    @classmethod
+    def from_chunks(cls, chunks, years, sexes, age_groups):
+        """Builds the distributions from tidy frames.
+
+        ``chunks`` is a callable returning an iterable of frames with ``year``,
+        ``sex``, ``age_group`` and ``unemployment_rate`` columns; it is called
+        twice (range pass, then binning pass). ``years``, ``sexes`` and
+        ``age_groups`` are the labels of the groups to compute.
+        """
+        years, sexes, age_groups = pd.Index(years), pd.Index(sexes), pd.Index(age_groups)
+        n_years = len(years)
+        keys = cls._keys(years, sexes, age_groups)
+        n_groups = len(keys)
+
+        def groups(frame):
+            """Returns ``(group ids, rates)``, each row appearing once per grouping."""
+            rates = frame['unemployment_rate'].to_numpy(dtype=np.float64)
+            y = years.get_indexer(frame['year'])
+            s = sexes.get_indexer(frame['sex'])
+            a = age_groups.get_indexer(frame['age_group'])
+            keep = ~np.isnan(rates) & (y >= 0) & (s >= 0) & (a >= 0)
+            rates, y, s, a = rates[keep], y[keep], s[keep], a[keep]
+            gids = np.concatenate([
+                y,
+                n_years + y * len(sexes) + s,
+                n_years * (1 + len(sexes)) + y * len(age_groups) + a,
+            ])
+            return gids, np.tile(rates, 3)
+
+        # Pass 1: size, range and moments of every group
+        n = np.zeros(n_groups)
+        total = np.zeros(n_groups)
+        total_sq = np.zeros(n_groups)
+        lo = np.full(n_groups, np.inf)
+        hi = np.full(n_groups, -np.inf)
+        for frame in chunks():
+            gids, rates = groups(frame)
+            n += np.bincount(gids, minlength=n_groups)
+            total += np.bincount(gids, rates, minlength=n_groups)
+            total_sq += np.bincount(gids, rates * rates, minlength=n_groups)
+            np.minimum.at(lo, gids, rates)
+            np.maximum.at(hi, gids, rates)
+
+        # numpy.histogram widens a zero-width range by 0.5 on each side
+        flat = lo == hi
+        lo, hi = np.where(flat, lo - 0.5, lo), np.where(flat, hi + 0.5, hi)
+
+        # Pass 2: display bins and the fine bins the KDE is evaluated from
+        counts = np.zeros(n_groups * cls.BINS)
+        fine = np.zeros(n_groups * cls.FINE_BINS)
+        for frame in chunks():
+            gids, rates = groups(frame)
+            position = (rates - lo[gids]) / (hi[gids] - lo[gids])
+            # The last bin is closed on the right, as in numpy.histogram
+            coarse_bin = np.minimum((position * cls.BINS).astype(np.int64), cls.BINS - 1)
+            fine_bin = np.minimum((position * cls.FINE_BINS).astype(np.int64), cls.FINE_BINS - 1)
+            counts += np.bincount(gids * cls.BINS + coarse_bin, minlength=counts.size)
+            fine += np.bincount(gids * cls.FINE_BINS + fine_bin, minlength=fine.size)
+        counts = counts.reshape(n_groups, cls.BINS)
+        fine = fine.reshape(n_groups, cls.FINE_BINS)
+
+        steps = np.linspace(0.0, 1.0, cls.BINS + 1)
+        edges = lo[:, None] + (hi - lo)[:, None] * steps
+        kde = np.full((n_groups, cls.GRIDSIZE), np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.sqrt((total_sq - total * total / n) / (n - 1))
+        bandwidth = std * n ** -0.2
+        fine_steps = (np.arange(cls.FINE_BINS) + 0.5) / cls.FINE_BINS
+        grid_steps = np.linspace(0.0, 1.0, cls.GRIDSIZE)
+        for g in np.flatnonzero((n > 1) & (bandwidth > 0)):
+            width = hi[g] - lo[g]
+            offsets = (grid_steps[:, None] - fine_steps[None, :]) * (width / bandwidth[g])
+            density = np.exp(-0.5 * offsets * offsets) @ fine[g] / (n[g] * bandwidth[g] * np.sqrt(2 * np.pi))
+            # Scale the density to the histogram's area (count per bin), as seaborn does
+            kde[g] = density * n[g] * width / cls.BINS
+
+        empty = n == 0
+        edges[empty] = np.nan
+        return cls(keys, edges.astype(np.float32), counts.astype(np.int32), kde.astype(np.float32))
+
+    def get(self, year, by=None, value=None):
+        """Returns the ``Distribution`` for a year (and optional subgroup), or None without data."""
+        i = self._index.get((int(year), by, value))
+        if i is None or np.isnan(self.edges[i, 0]):
+            return None
+        edges = self.edges[i]
+        kde_y = self.kde[i] if not np.isnan(self.kde[i, 0]) else None
+        return Distribution(edges, self.counts[i], np.linspace(edges[0], edges[-1], self.GRIDSIZE), kde_y)
+
+    def subgroups(self):
+        """``(by, value)`` pairs accepted by ``get``, in key order."""
+        return list(dict.fromkeys((by, value) for _, by, value in self.keys if by is not None))
+
+    def updated(self, frame, cube, changed_years):
+        """Returns distributions for a grown ``frame`` (aggregated in ``cube``),
+        recomputing only the years in ``changed_years``."""
+        changed_years = {int(y) for y in changed_years}
+        rows = frame[frame['year'].isin(changed_years)]
+        fresh = YearDistributions.from_frame(rows, sorted(changed_years), cube.sexes, cube.age_groups)
+        keys = self._keys(cube.years, cube.sexes, cube.age_groups)
+        sources = []
+        for key in keys:
+            source = fresh if key[0] in changed_years else self
+            i = source._index.get(key)
+            if i is None:
+                # A new sex or age group in an unchanged year has no rows there
+                sources.append((np.full(self.BINS + 1, np.nan), np.zeros(self.BINS), np.full(self.GRIDSIZE, np.nan)))
+            else:
+                sources.append((source.edges[i], source.counts[i], source.kde[i]))
+        edges, counts, kde = (np.stack(parts) for parts in zip(*sources))
+        return YearDistributions(keys, edges.astype(np.float32), counts.astype(np.int32), kde.astype(np.float32))
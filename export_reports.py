@@ -0,0 +1,216 @@
+"""Batch export of the analyzer's per-country charts as static report bundles.
+
+For every country this renders the trend chart for each sex/age group and the
+sex and age-group breakdowns for each year, using the same chart builders as
+``analyzer_page()``, and writes them to ``<out>/<country>/`` as PNG and/or PDF
+plus an ``index.html`` that lays the charts out as a report.
+
+Countries are rendered in parallel across a process pool. Workers reuse the
+dataset loaded by the parent (inherited on fork, otherwise memory-mapped from
+the Arrow cache) instead of parsing the CSV again. A ``manifest.json`` records
+a fingerprint of each chart's data, labels and builder code, so charts that
+have not changed since the last run are skipped.
+
+    python export_reports.py --out reports --formats png,pdf --jobs 8
+"""
+import argparse
+import hashlib
+import html
+import inspect
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+import dataset
+from analyzer import breakdown_figure, trend_figure
+from figure_cache import SAVEFIG_KWARGS
+
+FORMATS = ('png', 'pdf')
+MANIFEST = 'manifest.json'
+
+# Editing a chart builder changes its source and so invalidates its exported charts
+BUILDER_VERSIONS = {
+    builder.__name__: hashlib.sha256(inspect.getsource(builder).encode()).hexdigest()[:16]
+    for builder in (trend_figure, breakdown_figure)
+}
+
+_data = None
+
+
+def slugify(name):
+    return re.sub(r'[^A-Za-z0-9]+', '_', name).strip('_')
+
+
+def _init_worker(csv_path):
+    global _data
+    if _data is None:
+        frame, version = dataset.load_tidy(csv_path)
+        _data = dataset.TidyData(frame, version)
+
+
+def country_charts(data, country, years):
+    """Yields ``(chart_id, title, slice, build)`` for every chart of ``country``."""
+    cube = data.cube
+    for sex in cube.sexes:
+        for age_group in cube.age_groups:
+            trend_data = data.select(country_name=country, sex=sex, age_group=age_group)
+            if not trend_data['unemployment_rate'].isna().all():
+                yield (
+                    f'trend_{slugify(sex)}_{slugify(age_group)}',
+                    f'Trend ({sex}, {age_group})',
+                    trend_data,
+                    lambda d=trend_data, s=sex, a=age_group: trend_figure(d, country, s, a),
+                )
+    for year in years:
+        detail_data = data.select(country_name=country, year=year)
+        if detail_data['unemployment_rate'].isna().all():
+            continue
+        for column, label in (('sex', 'Sex'), ('age_group', 'Age Group')):
+            yield (
+                f'{column}_{year}',
+                f'By {label} ({year})',
+                detail_data,
+                lambda d=detail_data, c=column, l=label, y=year: breakdown_figure(d, c, l, country, y),
+            )
+
+
+def fingerprint(chart_id, data_slice, formats):
+    builder = 'trend_figure' if chart_id.startswith('trend_') else 'breakdown_figure'
+    digest = hashlib.sha256()
+    digest.update(f'{chart_id}|{BUILDER_VERSIONS[builder]}|{",".join(formats)}'.encode())
+    for col in ('country_name', 'sex', 'age_group'):
+        digest.update('|'.join(map(str, data_slice[col])).encode())
+    digest.update(data_slice['year'].to_numpy().tobytes())
+    digest.update(data_slice['unemployment_rate'].to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def export_country(country, out_dir, formats, years, previous):
+    """Renders one country's bundle; returns ``(country, {chart_id: fingerprint}, n_rendered)``."""
+    directory = os.path.join(out_dir, slugify(country))
+    os.makedirs(directory, exist_ok=True)
+    fingerprints, rendered = {}, 0
+
+    for chart_id, title, data_slice, build in country_charts(_data, country, years):
+        key = fingerprint(chart_id, data_slice, formats)
+        fingerprints[chart_id] = key
+        paths = [os.path.join(directory, f'{chart_id}.{fmt}') for fmt in formats]
+        if previous.get(chart_id) == key and all(os.path.exists(p) for p in paths):
+            continue
+        fig = build()
+        try:
+            for path, fmt in zip(paths, formats):
+                fig.savefig(path, format=fmt, **SAVEFIG_KWARGS)
+        finally:
+            plt.close(fig)
+        rendered += 1
+
+    # List every chart exported so far (the manifest entries merged as in main()),
+    # so a run restricted with --years keeps the other years in the report
+    exported = {**previous, **fingerprints}
+    sections = []
+    for chart_id, title, _, _ in country_charts(_data, country, _data.cube.years.tolist()):
+        if chart_id not in exported:
+            continue
+        available = [fmt for fmt in FORMATS if os.path.exists(os.path.join(directory, f'{chart_id}.{fmt}'))]
+        if available:
+            sections.append((chart_id, title, available))
+    write_index(directory, country, sections)
+    return country, fingerprints, rendered
+
+
+def write_index(directory, country, sections):
+    """Writes ``index.html`` for ``sections`` of ``(chart_id, title, formats on disk)``."""
+    parts = [
+        '<!DOCTYPE html>',
+        f'<html><head><meta charset="utf-8"><title>{html.escape(country)} unemployment report</title>',
+        '<style>body{font-family:sans-serif;max-width:960px;margin:auto}img{width:100%}</style></head><body>',
+        f'<h1>{html.escape(country)}</h1>',
+    ]
+    for chart_id, title, formats in sections:
+        parts.append(f'<h2>{html.escape(title)}</h2>')
+        if 'png' in formats:
+            parts.append(f'<img src="{chart_id}.png" alt="{html.escape(title)}" loading="lazy">')
+        links = ' | '.join(f'<a href="{chart_id}.{fmt}">{fmt.upper()}</a>' for fmt in formats)
+        parts.append(f'<p>{links}</p>')
+    parts.append('</body></html>')
+    with open(os.path.join(directory, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(parts))
+
+
+def write_root_index(out_dir, countries):
+    items = '\n'.join(
+        f'<li><a href="{slugify(c)}/index.html">{html.escape(c)}</a></li>' for c in countries
+    )
+    with open(os.path.join(out_dir, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>Unemployment reports</title></head>'
+                f'<body><h1>Unemployment reports</h1><ul>\n{items}\n</ul></body></html>')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--csv', default=dataset.DATA_FILE, help="Source CSV (default: %(default)s)")
+    parser.add_argument('--out', default='reports', help="Output directory (default: %(default)s)")
+    parser.add_argument('--formats', default='png,pdf', help="Comma-separated chart formats: png, pdf")
+    parser.add_argument('--countries', nargs='*', help="Only export these countries")
+    parser.add_argument('--years', nargs='*', type=int, help="Only export breakdowns for these years")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    formats = [fmt.strip().lower() for fmt in args.formats.split(',') if fmt.strip()]
+    unknown = set(formats) - set(FORMATS)
+    if unknown or not formats:
+        parser.error(f"unsupported format(s): {', '.join(sorted(unknown)) or '(none)'}; choose from {', '.join(FORMATS)}")
+
+    start = time.perf_counter()
+    global _data
+    frame, version = dataset.load_tidy(args.csv)
+    _data = dataset.TidyData(frame, version)
+
+    countries = list(_data.cube.countries)
+    if args.countries:
+        missing = set(args.countries) - set(countries)
+        if missing:
+            parser.error(f"unknown countries: {', '.join(sorted(missing))}")
+        countries = args.countries
+    years = args.years or _data.cube.years.tolist()
+
+    os.makedirs(args.out, exist_ok=True)
+    manifest_path = os.path.join(args.out, MANIFEST)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    total_rendered = total_charts = 0
+    with ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker, initargs=(args.csv,)) as pool:
+        futures = [
+            pool.submit(export_country, country, args.out, formats, years, manifest.get(country, {}))
+            for country in countries
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            country, fingerprints, rendered = future.result()
+            # Merge, so a run restricted with --years keeps the other years' entries
+            manifest.setdefault(country, {}).update(fingerprints)
+            total_rendered += rendered
+            total_charts += len(fingerprints)
+            print(f"[{done}/{len(countries)}] {country}: {rendered}/{len(fingerprints)} charts rendered", file=sys.stderr)
+
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    write_root_index(args.out, sorted(manifest))
+    print(f"Rendered {total_rendered} of {total_charts} charts for {len(countries)} countries "
+          f"in {time.perf_counter() - start:.1f}s -> {args.out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import matplotlib.pyplot as plt
+import streamlit as st
+
+from profiling import stage
+
+# Same savefig settings st.pyplot uses, so cached images look identical
+SAVEFIG_KWARGS = {'bbox_inches': 'tight', 'dpi': 200}
+
+DEFAULT_BUDGET_MB = float(os.environ.get('FIGURE_CACHE_MB', 64))
+
+
+class FigureCache:
+    """Thread-safe LRU cache of rendered matplotlib figures stored as image bytes.
+
+    Entries are keyed by the full filter tuple of the chart, e.g.
+    ``('trend', country, sex, age_group)``. When the stored bytes exceed
+    ``max_bytes`` the least recently used images are evicted. Every figure is
+    closed right after it is rasterized, so pyplot never accumulates open
+    figures no matter how often a chart is requested.
+    """
+
+    def __init__(self, max_bytes, fmt='png'):
+        self.max_bytes = max_bytes
+        self.fmt = fmt
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        """Total bytes currently held."""
+        return self._size
+
+    def render(self, key, build):
+        """Returns the image bytes for ``key``, calling ``build()`` to create the figure on a miss."""
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return image
+            self.misses += 1
+
+        open_before = set(plt.get_fignums())
+        try:
+            with stage('build'):
+                fig = build()
+        except BaseException:
+            # Close whatever the failed build opened; rasterize() only closes finished figures
+            for num in set(plt.get_fignums()) - open_before:
+                plt.close(num)
+            raise
+        with stage('rasterize'):
+            image = rasterize(fig, self.fmt)
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = image
+                self._size += len(image)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+        return image
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+def rasterize(fig, fmt='png'):
+    """Saves ``fig`` to bytes and always closes it."""
+    try:
+        buf = io.BytesIO()
+        fig.savefig(buf, format=fmt, **SAVEFIG_KWARGS)
+        return buf.getvalue()
+    finally:
+        plt.close(fig)
+
+
+@st.cache_resource
+def get_figure_cache(max_mb=DEFAULT_BUDGET_MB):
+    """Process-wide figure cache shared by all sessions (budget from FIGURE_CACHE_MB)."""
+    return FigureCache(int(max_mb * 1024 * 1024))
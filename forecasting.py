@@ -0,0 +1,185 @@
+import os
+from collections import namedtuple
+from statistics import NormalDist
+
+import numpy as np
+import streamlit as st
+
+from profiling import stage
+
+# Projection of one series: future years, point forecast and prediction interval bounds
+Forecast = namedtuple('Forecast', ['years', 'mean', 'lower', 'upper'])
+
+MODELS = {
+    'damped': 'Damped trend (Holt)',
+    'ses': 'Exponential smoothing',
+    'linear': 'Linear trend',
+}
+DEFAULT_MODEL = os.environ.get('FORECAST_MODEL', 'damped')
+HORIZON = int(os.environ.get('FORECAST_YEARS', 3))
+LEVEL = float(os.environ.get('FORECAST_LEVEL', 0.95))
+
+# Smoothing parameters tried for every series; the pair with the lowest
+# one-step-ahead error is kept per series
+ALPHAS = np.array([0.2, 0.4, 0.6, 0.8, 1.0])
+BETAS = np.array([0.05, 0.2, 0.5])
+PHIS = np.array([0.8, 0.9, 0.98])
+
+
+def _first_valid(present):
+    """Column of the first True in each row (0 for rows without any)."""
+    return np.argmax(present, axis=1)
+
+
+def _linear(values, steps, horizon, z):
+    """Least-squares line per row, fitted on the rows' present values."""
+    present = ~np.isnan(values)
+    x = np.where(present, steps, 0.0)
+    y = np.where(present, values, 0.0)
+    n = present.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x_mean = x.sum(axis=1) / n
+        y_mean = y.sum(axis=1) / n
+        dx = np.where(present, steps - x_mean[:, None], 0.0)
+        sxx = (dx * dx).sum(axis=1)
+        slope = (dx * (y - y_mean[:, None])).sum(axis=1) / sxx
+        intercept = y_mean - slope * x_mean
+        residuals = np.where(present, values - (intercept[:, None] + slope[:, None] * steps), 0.0)
+        sigma = np.sqrt((residuals * residuals).sum(axis=1) / (n - 2))
+        future = steps[-1] + np.arange(1, horizon + 1)
+        mean = intercept[:, None] + slope[:, None] * future
+        spread = z * sigma[:, None] * np.sqrt(1 + 1 / n[:, None] + (future - x_mean[:, None]) ** 2 / sxx[:, None])
+    fitted = n >= 3
+    return np.where(fitted[:, None], mean, np.nan), np.where(fitted[:, None], spread, np.nan)
+
+
+def _smoothing(values, horizon, z, alphas, betas, phis):
+    """Additive damped-trend exponential smoothing, fitted to every row and parameter set at once.
+
+    The state arrays are shaped (parameter sets, rows) and the recursion runs
+    over the year columns, so the Python loop is as long as the series, not
+    the number of series. Missing years carry the previous forecast forward.
+    """
+    n_rows, n_steps = values.shape
+    alpha, beta, phi = (p[:, None] for p in (alphas, betas, phis))
+    present = ~np.isnan(values)
+    first = _first_valid(present)
+    rows = np.arange(n_rows)
+    later = present & (np.arange(n_steps) > first[:, None])
+    second = np.where(later.any(axis=1), _first_valid(later), first)
+
+    level = np.broadcast_to(values[rows, first], (len(alphas), n_rows)).copy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        initial_trend = np.where(second > first, (values[rows, second] - values[rows, first]) / (second - first), 0.0)
+    trend = np.broadcast_to(initial_trend, (len(alphas), n_rows)) * (beta > 0)
+    sse = np.zeros((len(alphas), n_rows))
+    n_errors = np.zeros(n_rows)
+    for t in range(n_steps):
+        active = t > first
+        predicted = level + phi * trend
+        observed = active & present[:, t]
+        error = np.where(observed, values[:, t] - predicted, 0.0)
+        new_level = predicted + alpha * error
+        trend = np.where(active, phi * trend + beta * (new_level - level - phi * trend), trend)
+        level = np.where(active, new_level, level)
+        sse += error * error
+        n_errors += observed
+
+    best = np.argmin(sse, axis=0)
+    level, trend, sse = level[best, rows], trend[best, rows], sse[best, rows]
+    alpha, beta, phi = alphas[best], betas[best], phis[best]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sigma = np.sqrt(sse / n_errors)
+
+    h = np.arange(1, horizon + 1)
+    damping = np.cumsum(phi[:, None] ** h, axis=1)  # phi + phi^2 + ... + phi^h
+    mean = level[:, None] + damping * trend[:, None]
+    # Variance of the h-step error: sigma^2 (1 + sum_{j<h} (alpha (1 + beta * damping_j))^2)
+    c = alpha[:, None] * (1 + beta[:, None] * damping[:, :-1])
+    variance = 1 + np.concatenate([np.zeros((n_rows, 1)), np.cumsum(c * c, axis=1)], axis=1)
+    spread = z * sigma[:, None] * np.sqrt(variance)
+    fitted = n_errors >= 2
+    return np.where(fitted[:, None], mean, np.nan), np.where(fitted[:, None], spread, np.nan)
+
+
+def fit(values, steps, model=DEFAULT_MODEL, horizon=HORIZON, level=LEVEL):
+    """Forecasts every row of a (series, year) matrix ``horizon`` steps ahead.
+
+    ``values`` holds the rates with NaN for missing years, ``steps`` the year
+    of each column. Returns ``(mean, lower, upper)``, each shaped
+    (series, horizon); rows with too little data are NaN. Rates are clipped to
+    0-100 and the interval covers ``level`` under a normal error assumption.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    steps = np.asarray(steps, dtype=np.float64)
+    z = NormalDist().inv_cdf(0.5 + level / 2)
+    if model == 'linear':
+        mean, spread = _linear(values, steps, horizon, z)
+    elif model == 'ses':
+        alphas = np.linspace(0.1, 1.0, 10)
+        mean, spread = _smoothing(values, horizon, z, alphas, np.zeros_like(alphas), np.zeros_like(alphas))
+    elif model == 'damped':
+        alphas, betas, phis = (grid.ravel() for grid in np.meshgrid(ALPHAS, BETAS, PHIS, indexing='ij'))
+        mean, spread = _smoothing(values, horizon, z, alphas, betas, phis)
+    else:
+        raise ValueError(f"Unknown forecast model '{model}', expected one of {list(MODELS)}")
+    return np.clip(mean, 0, 100), np.clip(mean - spread, 0, 100), np.clip(mean + spread, 0, 100)
+
+
+class CubeForecasts:
+    """Forecasts of every series in an ``AggregateCube``, fitted in one pass.
+
+    All (country, sex, age_group) cell series and the per-country overall
+    series are stacked into one (series, year) matrix and fitted together
+    (see ``fit``); the results are stored as float32 arrays shaped like the
+    cube with a horizon axis in place of the year axis:
+
+    - ``cells``   (3, country, sex, age_group, horizon): mean, lower, upper
+    - ``overall`` (3, country, horizon)
+    """
+
+    def __init__(self, cube, model=DEFAULT_MODEL, horizon=HORIZON, level=LEVEL):
+        self.cube = cube
+        self.model = model
+        self.level = level
+        self.years = (int(cube.years[-1]) + np.arange(1, horizon + 1)).astype(np.int16)
+        n_cells = cube.cells[..., 0].size
+        series = np.concatenate([
+            cube.cells.reshape(n_cells, len(cube.years)),
+            cube.overall,
+        ])
+        result = np.stack(fit(series, cube.years, model, horizon, level)).astype(np.float32)
+        self.cells = result[:, :n_cells].reshape(3, *cube.cells.shape[:3], horizon)
+        self.overall = result[:, n_cells:]
+        for array in (self.years, self.cells, self.overall):
+            array.flags.writeable = False
+
+    def year_index(self, year):
+        return int(np.searchsorted(self.years, year))
+
+    def cell(self, country, sex, age_group):
+        """Returns the ``Forecast`` of one cell series, or None when it has too little data."""
+        cube = self.cube
+        c = cube.countries.get_indexer([country])[0]
+        if c < 0:
+            return None
+        mean, lower, upper = self.cells[:, c, cube.sexes.get_loc(sex), cube.age_groups.get_loc(age_group)]
+        if np.isnan(mean[0]):
+            return None
+        return Forecast(self.years, mean, lower, upper)
+
+    def overall_for(self, year):
+        """``(mean, lower, upper)`` per country for a forecast ``year``, across all sexes and age groups."""
+        return self.overall[:, :, self.year_index(year)]
+
+
+@st.cache_resource(max_entries=8)
+def _forecasts(version, model, horizon, level, _cube):
+    with stage('forecast'):
+        return CubeForecasts(_cube, model, horizon, level)
+
+
+def get_forecasts(data, model=DEFAULT_MODEL):
+    """Process-wide forecasts for a dataset, cached per dataset version and model
+    (horizon from FORECAST_YEARS, interval level from FORECAST_LEVEL)."""
+    return _forecasts(data.version, model, HORIZON, LEVEL, data.cube)
@@ -0,0 +1,292 @@
+"""Opt-in per-stage timing for page reruns.
+
+Enable with ``APP_PROFILE=1`` (all sessions) or the ``?profile=1`` query
+parameter (one session). Pages wrap their logical stages in ``stage(name)``;
+``run_page`` collects them for each rerun and shows a sidebar panel with the
+breakdown of the last rerun and rolling statistics over recent ones.
+
+Per-stage memory peaks need ``tracemalloc``, which slows down every
+allocation in the process and whose peak counter is process-wide. It is
+therefore only used when the operator sets ``APP_PROFILE``, only for the
+duration of a profiled run, and only for one run at a time; runs profiled
+through the query parameter, or concurrently with a traced one, report
+timings only.
+
+Optional extras (set by the operator, not per visitor):
+
+- ``APP_PROFILE_CPROFILE=<dir>``: run every profiled rerun under cProfile,
+  dump ``.prof`` files to the directory and list the top functions in the panel.
+- ``APP_PROFILE_LOG=<file>``: append one JSON line per rerun with its timings.
+
+Chart sections decorated with ``fragment(name)`` rerun on their own; those
+partial reruns are recorded in the same history under the section's name.
+
+When profiling is off ``stage()`` returns a shared no-op context manager.
+"""
+import contextlib
+import cProfile
+import functools
+import importlib
+import io
+import itertools
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+HISTORY_LENGTH = 50
+
+# Libraries whose import cost page modules should only pay when they are routed to
+HEAVY_MODULES = ('plotly', 'seaborn', 'matplotlib', 'scipy')
+
+# First-import cost of each lazily loaded page module, for the startup report
+IMPORT_TIMES = {}
+
+_NOOP = contextlib.nullcontext()
+_local = threading.local()
+
+# Held by the one profiled run that is tracing memory
+_memory_lock = threading.Lock()
+_dump_ids = itertools.count()
+
+
+def _query_param(name):
+    try:
+        return st.query_params.get(name)
+    except Exception:
+        # No script run context (bare mode, CLI tools)
+        return None
+
+
+def enabled():
+    """Whether the current rerun is being profiled."""
+    return getattr(_local, 'run', None) is not None
+
+
+def _env_profile():
+    return os.environ.get('APP_PROFILE', '').lower() in ('1', 'true', 'yes')
+
+
+def _wants_profile():
+    return _env_profile() or _query_param('profile') is not None
+
+
+def _cprofile_dir():
+    return os.environ.get('APP_PROFILE_CPROFILE')
+
+
+@contextlib.contextmanager
+def _tracing_memory():
+    """Traces allocations for the duration of one run; yields whether it does.
+
+    Only with ``APP_PROFILE``, only when no other run (or other code) is
+    already tracing, and tracing is stopped again when the run ends.
+    """
+    if not _env_profile() or not _memory_lock.acquire(blocking=False):
+        yield False
+        return
+    try:
+        if tracemalloc.is_tracing():
+            yield False
+            return
+        tracemalloc.start()
+        try:
+            yield True
+        finally:
+            tracemalloc.stop()
+    finally:
+        _memory_lock.release()
+
+
+class _Stage:
+    __slots__ = ('name', 'start', 'mem_start', 'peak')
+
+    def __init__(self, name):
+        self.name = name
+        self.peak = 0
+
+    def __enter__(self):
+        run = _local.run
+        if run['stack']:
+            self.name = f"{run['stack'][-1].name}/{self.name}"
+        run['stack'].append(self)
+        if run['memory']:
+            self.mem_start, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        run = _local.run
+        if run['memory']:
+            _, peak = tracemalloc.get_traced_memory()
+            self.peak = max(self.peak, peak)
+        run['stack'].pop()
+        if run['stack']:
+            # reset_peak() above hid this stage's peak from the enclosing one
+            parent = run['stack'][-1]
+            parent.peak = max(parent.peak, self.peak)
+        run['stages'].append({
+            'stage': self.name,
+            'ms': round(elapsed * 1000, 3),
+            'peak_kb': round(max(self.peak - self.mem_start, 0) / 1024, 1) if run['memory'] else None,
+        })
+        return False
+
+
+def stage(name):
+    """Context manager timing one logical stage of the current rerun."""
+    if getattr(_local, 'run', None) is None:
+        return _NOOP
+    return _Stage(name)
+
+
+def import_page(module_name, attr):
+    """Imports a page module on first use and returns ``module.attr``.
+
+    The first import of each module is timed and recorded in ``IMPORT_TIMES``
+    together with the heavy plotting libraries it pulled in.
+    """
+    if module_name in sys.modules:
+        # import_module waits on the import lock, so a module another session
+        # is still importing is never handed out half-initialized
+        return getattr(importlib.import_module(module_name), attr)
+    before = set(sys.modules)
+    start = time.perf_counter()
+    with stage(f'import {module_name}'):
+        module = importlib.import_module(module_name)
+    if module_name not in IMPORT_TIMES:
+        loaded = set(sys.modules) - before
+        IMPORT_TIMES[module_name] = {
+            'module': module_name,
+            'ms': round((time.perf_counter() - start) * 1000, 1),
+            'modules_loaded': len(loaded),
+            'heavy': ', '.join(name for name in HEAVY_MODULES if name in loaded),
+        }
+        logger.info("Imported page module %s: %s", module_name, IMPORT_TIMES[module_name])
+    return getattr(module, attr)
+
+
+def run_page(page_name, page, started_at=None):
+    """Runs ``page()`` for this rerun, profiling it when enabled and rendering the panel.
+
+    ``started_at`` is the ``time.perf_counter()`` value taken at the top of the
+    app script; when given, the reported total covers the whole script run
+    (imports, sidebar and page) rather than just the page function.
+    """
+    if not _wants_profile():
+        page()
+        return
+    try:
+        _profiled(page_name, page, started_at)
+    finally:
+        render_panel()
+
+
+def fragment(name):
+    """Decorator turning a page section into an ``st.fragment`` that can be profiled.
+
+    On a full rerun the section runs inside the page's profiled run as stage
+    ``name``. When only the fragment reruns there is no page run, so the
+    section is profiled on its own and recorded under ``name``; the panel
+    lives in the sidebar, which a fragment cannot write to, and shows it on
+    the next full rerun.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def section(*args, **kwargs):
+            if enabled():
+                with stage(name):
+                    return func(*args, **kwargs)
+            if _wants_profile():
+                return _profiled(name, lambda: func(*args, **kwargs))
+            return func(*args, **kwargs)
+        return st.fragment(section)
+    return decorate
+
+
+def _profiled(name, body, started_at=None):
+    profiler = cProfile.Profile() if _cprofile_dir() else None
+    start = started_at if started_at is not None else time.perf_counter()
+    with _tracing_memory() as memory:
+        _local.run = {'page': name, 'stages': [], 'stack': [], 'memory': memory}
+        try:
+            if profiler:
+                profiler.runcall(body)
+            else:
+                body()
+        finally:
+            total_ms = (time.perf_counter() - start) * 1000
+            run, _local.run = _local.run, None
+            run['total_ms'] = round(total_ms, 3)
+            _record(run, profiler)
+
+
+def _record(run, profiler):
+    history = st.session_state.setdefault('_profiling_history', deque(maxlen=HISTORY_LENGTH))
+    history.append(run)
+
+    if profiler is not None:
+        directory = _cprofile_dir()
+        os.makedirs(directory, exist_ok=True)
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_dump_ids)}"
+        path = os.path.join(directory, f"{run['page'].replace(' ', '_')}-{stamp}.prof")
+        profiler.dump_stats(path)
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(15)
+        run['cprofile'] = {'path': path, 'top': out.getvalue()}
+
+    log_path = os.environ.get('APP_PROFILE_LOG')
+    if log_path:
+        with open(log_path, 'a') as f:
+            f.write(json.dumps({
+                'time': time.time(), 'page': run['page'], 'total_ms': run['total_ms'], 'stages': run['stages'],
+            }) + '\n')
+
+
+def rolling_stats(history):
+    """Per-stage count/mean/p50/p95 (ms) over the recorded reruns."""
+    samples = {}
+    for run in history:
+        samples.setdefault('(total)', []).append(run['total_ms'])
+        for entry in run['stages']:
+            samples.setdefault(entry['stage'], []).append(entry['ms'])
+    return [
+        {
+            'stage': name,
+            'count': len(values),
+            'mean_ms': round(float(np.mean(values)), 2),
+            'p50_ms': round(float(np.percentile(values, 50)), 2),
+            'p95_ms': round(float(np.percentile(values, 95)), 2),
+        }
+        for name, values in samples.items()
+    ]
+
+
+def render_panel():
+    history = st.session_state.get('_profiling_history')
+    if not history:
+        return
+    last = history[-1]
+    with st.sidebar.expander("⏱️ Profiling", expanded=False):
+        st.caption(f"Last rerun of {last['page']}: {last['total_ms']:.1f} ms")
+        st.dataframe(last['stages'], hide_index=True)
+        st.caption(f"Rolling statistics over the last {len(history)} reruns")
+        st.dataframe(rolling_stats(history), hide_index=True)
+        if IMPORT_TIMES:
+            st.caption("Startup: first import of each page module in this process")
+            st.dataframe(list(IMPORT_TIMES.values()), hide_index=True)
+        if 'cprofile' in last:
+            st.caption(f"cProfile dump: {last['cprofile']['path']}")
+            st.code(last['cprofile']['top'], language=None)
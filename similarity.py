@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from profiling import stage
+
+METRICS = {
+    'correlation': 'Correlation (shape)',
+    'euclidean': 'Euclidean (level and shape)',
+    'dtw': 'Dynamic time warping (shape, shifted)',
+}
+DEFAULT_METRIC = 'correlation'
+
+
+def _fill_gaps(rates):
+    """Linearly interpolates missing years of each row, extending the ends flat."""
+    return pd.DataFrame(rates).interpolate(axis=1, limit_direction='both').to_numpy(dtype=np.float64)
+
+
+def _znorm(values):
+    std = values.std(axis=1, keepdims=True)
+    return np.divide(values - values.mean(axis=1, keepdims=True), std, out=np.zeros_like(values), where=std > 0)
+
+
+def _squared_distances(a):
+    sq = (a * a).sum(axis=1)
+    return np.maximum(sq[:, None] + sq[None, :] - 2 * a @ a.T, 0)
+
+
+def _dtw(values, window):
+    """Pairwise DTW distances between rows, restricted to a band of ``window`` steps.
+
+    The dynamic programme runs over the (step, step) grid once, each cell
+    vectorized over all row pairs (upper triangle only).
+    """
+    n_rows, n_steps = values.shape
+    left, right = np.triu_indices(n_rows, k=1)
+    a, b = values[left], values[right]
+    previous = np.full((n_steps + 1, len(left)), np.inf)
+    previous[0] = 0
+    for i in range(1, n_steps + 1):
+        current = np.full_like(previous, np.inf)
+        for j in range(max(1, i - window), min(n_steps, i + window) + 1):
+            cost = (a[:, i - 1] - b[:, j - 1]) ** 2
+            current[j] = cost + np.minimum(np.minimum(previous[j], previous[j - 1]), current[j - 1])
+        previous = current
+    distances = np.zeros((n_rows, n_rows))
+    distances[left, right] = distances[right, left] = np.sqrt(previous[n_steps] / n_steps)
+    return distances
+
+
+class SimilarityIndex:
+    """Nearest countries by unemployment trajectory for every sex/age group and metric.
+
+    Each country's series for a (sex, age_group) cell of the cube becomes a
+    vector over the years (gaps interpolated; countries with fewer than
+    ``MIN_YEARS`` years of data are left out). Distances between all
+    countries are computed once per group with matrix operations:
+
+    - ``correlation``: 1 - Pearson r of the series (shape, ignoring level and scale)
+    - ``euclidean``: root-mean-square difference in percentage points
+    - ``dtw``: DTW of the z-normalized series within ``DTW_WINDOW`` years,
+      so trajectories that are similar but shifted in time still match
+
+    Only the ``K_MAX`` nearest neighbours of every country are kept, as
+    int16/float32 arrays shaped (metric, sex, age_group, country, K_MAX)
+    (position -1 past the last neighbour), so a top-k query is a slice.
+    """
+
+    K_MAX = 25
+    MIN_YEARS = 3
+    DTW_WINDOW = 2
+
+    def __init__(self, cube, k_max=K_MAX):
+        self.cube = cube
+        n_countries = len(cube.countries)
+        k_max = min(k_max, max(n_countries - 1, 0))
+        dtype = np.int16 if n_countries < 2**15 else np.int32
+        shape = (len(METRICS), len(cube.sexes), len(cube.age_groups), n_countries, k_max)
+        self.neighbours = np.full(shape, -1, dtype=dtype)
+        self.distances = np.full(shape, np.nan, dtype=np.float32)
+
+        for s in range(len(cube.sexes)):
+            for a in range(len(cube.age_groups)):
+                rates = cube.cells[:, s, a, :]
+                valid = (~np.isnan(rates)).sum(axis=1) >= self.MIN_YEARS
+                rows = np.flatnonzero(valid)
+                if len(rows) < 2:
+                    continue
+                values = _fill_gaps(rates[rows])
+                normalized = _znorm(values)
+                matrices = {
+                    'correlation': 1 - normalized @ normalized.T / values.shape[1],
+                    'euclidean': np.sqrt(_squared_distances(values) / values.shape[1]),
+                    'dtw': _dtw(normalized, self.DTW_WINDOW),
+                }
+                for m, metric in enumerate(METRICS):
+                    self._keep_nearest(m, s, a, rows, matrices[metric])
+
+        for array in (self.neighbours, self.distances):
+            array.flags.writeable = False
+
+    def _keep_nearest(self, m, s, a, rows, distances):
+        np.fill_diagonal(distances, np.inf)
+        k = min(self.neighbours.shape[-1], len(rows) - 1)
+        nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        nearest_distances = np.take_along_axis(distances, nearest, axis=1)
+        order = np.argsort(nearest_distances, axis=1, kind='stable')
+        self.neighbours[m, s, a, rows, :k] = rows[np.take_along_axis(nearest, order, axis=1)]
+        self.distances[m, s, a, rows, :k] = np.take_along_axis(nearest_distances, order, axis=1)
+
+    def query(self, country, sex, age_group, k=5, metric=DEFAULT_METRIC):
+        """Returns ``(positions, distances)`` of the ``k`` countries nearest to ``country``, nearest first."""
+        cube = self.cube
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric '{metric}', expected one of {list(METRICS)}")
+        c = cube.countries.get_indexer([country])[0]
+        if c < 0:
+            raise KeyError(country)
+        cell = (list(METRICS).index(metric), cube.sexes.get_loc(sex), cube.age_groups.get_loc(age_group), c)
+        positions = self.neighbours[cell][:k]
+        found = positions >= 0
+        return positions[found], self.distances[cell][:k][found]
+
+    def frame(self, country, sex, age_group, k=5, metric=DEFAULT_METRIC):
+        """Chart-ready rows for the ``k`` nearest countries: country and distance, nearest first."""
+        positions, distances = self.query(country, sex, age_group, k, metric)
+        return pd.DataFrame({
+            'country_name': np.asarray(self.cube.countries, dtype=object)[positions],
+            'distance': distances,
+        })
+
+
+@st.cache_resource(max_entries=4)
+def _similarity_index(version, _cube):
+    with stage('similarity.index'):
+        return SimilarityIndex(_cube)
+
+
+def get_similarity_index(data):
+    """Process-wide similarity index for a dataset, built once per dataset version."""
+    return _similarity_index(data.version, data.cube)
+
+
+def similar_countries(data, country, sex, age_group, k=5, metric=DEFAULT_METRIC):
+    """The ``k`` countries whose ``sex``/``age_group`` unemployment trajectory is closest to ``country``'s.
+
+    ``similar_countries(load_data(), 'Spain', 'Female', '15-24', k=5, metric='dtw')``
+    """
+    return get_similarity_index(data).frame(country, sex, age_group, k, metric)
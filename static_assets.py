@@ -0,0 +1,154 @@
+"""Locally served homepage animations and page background.
+
+The files live in ``static/`` and are served by Streamlit's static file
+serving (enabled in ``.streamlit/config.toml``) under ``app/static/``, so the
+pages do not depend on third-party hosts. Filenames carry the asset version,
+so a changed asset gets a new URL and browsers can keep cached copies.
+
+The lottie-web library (MIT, see ``static/LICENSE-lottie-web.md``) is
+committed. The animation data and the background image are third-party
+content under their own terms and are not: where they were never fetched
+(e.g. an air-gapped deployment) each animation degrades to an icon and the
+background to plain dark. To (re)download missing files from their original
+sources:
+
+    python static_assets.py
+"""
+import argparse
+import json
+import os
+import sys
+import urllib.request
+
+import streamlit as st
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+URL_PREFIX = 'app/static/'
+
+# name -> (file in static/, original source)
+ASSETS = {
+    'lottie': ('lottie-5.7.5.min.js', 'https://cdnjs.cloudflare.com/ajax/libs/lottie-web/5.7.5/lottie.min.js'),
+    'welcome': ('lottie/welcome-4S1l8e9JXV.json', 'https://lottie.host/02c12a6c-dead-4c3e-a233-0b5e6b06453d/4S1l8e9JXV.json'),
+    'about': ('lottie/about-dcu5socJLL.json', 'https://lottie.host/bcf3116a-d3a1-4316-b1a3-1848000225f8/dcu5socJLL.json'),
+    'contact': ('lottie/contact-pm5kmrEFLJ.json', 'https://lottie.host/ccb5e690-be42-48b4-a770-58765f7e8a60/pm5kmrEFLJ.json'),
+    'background': ('background-879351.jpg', 'https://wallpaperbat.com/img/879351-analysis-wallpaper-top-free-analysis-background.jpg'),
+}
+
+
+def available(name):
+    return os.path.isfile(os.path.join(STATIC_DIR, ASSETS[name][0]))
+
+
+def url(name):
+    """Relative URL of a bundled asset, or None when it is not available."""
+    if not available(name) or not st.get_option('server.enableStaticServing'):
+        return None
+    return URL_PREFIX + ASSETS[name][0]
+
+
+def page_background():
+    """Injects the darkened background image shared by all pages (plain dark colour without it)."""
+    image = url('background')
+    layers = 'linear-gradient(rgba(0,0,0,0.6), rgba(0,0,0,0.6))' + (f', url("{image}")' if image else '')
+    st.markdown(
+        f"""
+        <style>
+        .stApp {{
+            background-image: {layers};
+            background-size: cover;
+            background-repeat: no-repeat;
+            background-attachment: fixed;
+        }}
+        </style>
+        """,
+        unsafe_allow_html=True
+    )
+
+
+def lottie_row(animations, height):
+    """Plays several animations side by side in one iframe, loading the lottie library once.
+
+    ``animations`` is a list of ``(asset name, height in px, fallback icon)``;
+    each cell shows its icon instead when the library or its animation data
+    cannot be loaded.
+    """
+    library = url('lottie')
+    cells = [
+        {'path': url(name) if library else None, 'height': cell_height, 'icon': icon}
+        for name, cell_height, icon in animations
+    ]
+    st.iframe(f"""
+    <style>
+        body {{ margin: 0; }}
+        .row {{ display: grid; grid-template-columns: repeat({len(cells)}, 1fr); column-gap: 1rem; align-items: start; }}
+        .cell {{ background: transparent; margin: auto; width: 100%; }}
+        .icon {{ display: flex; align-items: center; justify-content: center; font-size: 72px; }}
+    </style>
+    <div class="row" id="row"></div>
+    <script>
+        const cells = {json.dumps(cells)};
+        const row = document.getElementById('row');
+        const showIcon = (el, icon) => {{ el.innerHTML = ''; el.classList.add('icon'); el.textContent = icon; }};
+        const elements = cells.map(cell => {{
+            const el = document.createElement('div');
+            el.className = 'cell';
+            el.style.height = cell.height + 'px';
+            row.appendChild(el);
+            return el;
+        }});
+        function play() {{
+            cells.forEach((cell, i) => {{
+                if (!window.lottie || !cell.path) {{ showIcon(elements[i], cell.icon); return; }}
+                const animation = lottie.loadAnimation({{
+                    container: elements[i],
+                    renderer: 'svg',
+                    loop: true,
+                    autoplay: true,
+                    path: cell.path,
+                    rendererSettings: {{
+                        preserveAspectRatio: 'xMidYMid meet',
+                        progressiveLoad: true,
+                        clearCanvas: true
+                    }}
+                }});
+                animation.addEventListener('data_failed', () => showIcon(elements[i], cell.icon));
+            }});
+        }}
+    </script>
+    {f'<script src="{library}" onload="play()" onerror="play()"></script>' if library else '<script>play()</script>'}
+    """, height=height)
+
+
+def fetch(force=False):
+    """Downloads the assets that are missing (or all of them with ``force``) into ``static/``."""
+    failed = []
+    for name, (filename, source) in ASSETS.items():
+        path = os.path.join(STATIC_DIR, filename)
+        if os.path.exists(path) and not force:
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            request = urllib.request.Request(source, headers={'User-Agent': 'Mozilla/5.0'})
+            with urllib.request.urlopen(request, timeout=30) as response, open(tmp_path, 'wb') as f:
+                f.write(response.read())
+            os.replace(tmp_path, path)
+            print(f"{name}: {source} -> {os.path.relpath(path)}")
+        except OSError as e:
+            failed.append(name)
+            print(f"{name}: failed to fetch {source}: {e}", file=sys.stderr)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--force', action='store_true', help="Download every asset even if it is already present")
+    args = parser.parse_args(argv)
+    return 1 if fetch(args.force) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
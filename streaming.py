@@ -0,0 +1,140 @@
+"""Chunked ingestion for CSV exports that are too large to melt in memory.
+
+The wide CSV is read ``STREAMING_CHUNK_ROWS`` rows at a time. Each chunk is
+melted and downcast with ``dataset.tidy``, folded into a ``CubeAccumulator`` and
+appended as a row group to a Parquet store next to the CSV. Only the aggregate
+cube stays in memory; drill-down slices are read back from the store with
+predicate push-down, so peak memory depends on the chunk size rather than on
+the size of the file.
+
+Streaming is used when ``STREAMING_INGEST=1`` or, if that variable is unset,
+for CSVs larger than ``STREAMING_THRESHOLD_MB``.
+"""
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import columnar_cache
+from aggregates import AggregateCube, CubeAccumulator
+from correlation import YearCorrelations
+from distributions import YearDistributions
+from dataset import ID_VARS, tidy
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = int(os.environ.get('STREAMING_CHUNK_ROWS', 50_000))
+THRESHOLD_MB = float(os.environ.get('STREAMING_THRESHOLD_MB', 512))
+
+STORE_SCHEMA = pa.schema(
+    [(col, pa.string()) for col in ID_VARS]
+    + [('year', pa.int16()), ('unemployment_rate', pa.float32())]
+)
+
+
+def enabled(csv_path):
+    """Whether ``csv_path`` should be loaded through the streaming path."""
+    flag = os.environ.get('STREAMING_INGEST')
+    if flag is not None:
+        return flag.strip().lower() in ('1', 'true', 'yes')
+    return os.path.getsize(csv_path) > THRESHOLD_MB * 1024 * 1024
+
+
+def store_path(csv_path):
+    return os.path.splitext(csv_path)[0] + '.parquet'
+
+
+def cube_path(csv_path):
+    return os.path.splitext(csv_path)[0] + '.cube.npz'
+
+
+def ingest(csv_path, chunk_rows=CHUNK_ROWS):
+    """Streams ``csv_path`` into the Parquet store and returns ``(cube, sha256)``."""
+    metadata = columnar_cache.source_metadata(csv_path)
+    accumulator = CubeAccumulator()
+    path = store_path(csv_path)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with pq.ParquetWriter(tmp_path, STORE_SCHEMA.with_metadata(metadata)) as writer:
+            for chunk in pd.read_csv(csv_path, chunksize=chunk_rows):
+                long = tidy(chunk)
+                accumulator.add(long)
+                writer.write_table(pa.Table.from_pandas(long, schema=STORE_SCHEMA, preserve_index=False))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    cube = accumulator.to_cube()
+    save_cube(cube, cube_path(csv_path), metadata)
+    return cube, metadata['csv_sha256']
+
+
+def save_cube(cube, path, metadata):
+    np.savez(
+        path,
+        countries=np.asarray(cube.countries, dtype=str),
+        sexes=np.asarray(cube.sexes, dtype=str),
+        age_groups=np.asarray(cube.age_groups, dtype=str),
+        years=cube.years,
+        sums=cube.sums,
+        counts=cube.counts,
+        metadata=json.dumps(metadata),
+    )
+
+
+def load_cube(path):
+    """Returns ``(cube, metadata)`` from a file written by ``save_cube``."""
+    with np.load(path) as npz:
+        cube = AggregateCube(
+            npz['countries'].tolist(), npz['sexes'].tolist(), npz['age_groups'].tolist(),
+            npz['years'], npz['sums'], npz['counts'],
+        )
+        return cube, json.loads(str(npz['metadata']))
+
+
+def open_store(csv_path):
+    """Returns a ``StreamedData`` for the CSV, ingesting it first if the store is missing or stale."""
+    try:
+        cube, metadata = load_cube(cube_path(csv_path))
+        store_meta = columnar_cache.decode_metadata(pq.read_schema(store_path(csv_path)).metadata)
+        if store_meta.get('csv_sha256') == metadata.get('csv_sha256') and columnar_cache.is_fresh(metadata, csv_path):
+            return StreamedData(store_path(csv_path), cube, metadata['csv_sha256'])
+    except (OSError, ValueError, KeyError) as e:
+        logger.info("Rebuilding streaming store for %s: %s", csv_path, e)
+    cube, version = ingest(csv_path)
+    return StreamedData(store_path(csv_path), cube, version)
+
+
+class StreamedData:
+    """Same lookup interface as ``dataset.TidyData`` (``select``, ``cube``,
+    ``correlations``, ``distributions``, ``version``), backed by the on-disk
+    Parquet store."""
+
+    def __init__(self, store, cube, version=None):
+        self.store = store
+        self.cube = cube
+        self.version = version
+        self.correlations = YearCorrelations(cube)
+        self.distributions = YearDistributions.from_chunks(self._rate_batches, cube.years, cube.sexes, cube.age_groups)
+
+    def _rate_batches(self):
+        columns = ['year', 'sex', 'age_group', 'unemployment_rate']
+        for batch in pq.ParquetFile(self.store).iter_batches(batch_size=CHUNK_ROWS, columns=columns):
+            yield batch.to_pandas()
+
+    def select(self, **filters):
+        """Returns the rows matching all ``column=value`` filters, read from the store."""
+        filters = [(col, '=', value.item() if hasattr(value, 'item') else value) for col, value in filters.items()]
+        frame = pq.read_table(self.store, filters=filters or None).to_pandas()
+        return frame.astype({
+            'country_name': pd.CategoricalDtype(self.cube.countries),
+            'sex': pd.CategoricalDtype(self.cube.sexes),
+            'age_group': pd.CategoricalDtype(self.cube.age_groups),
+            'indicator_name': 'category',
+            'age_categories': 'category',
+        })
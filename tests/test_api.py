@@ -0,0 +1,85 @@
+import json
+import os
+import shutil
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api  # noqa: E402
+import dataset  # noqa: E402
+
+SOURCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), dataset.DATA_FILE)
+TOP = {'query': 'top', 'year': 2023, 'sex': 'Female', 'age_group': '15-24'}
+
+
+@pytest.fixture(scope='module')
+def service(tmp_path_factory):
+    path = tmp_path_factory.mktemp('api') / 'data.csv'
+    shutil.copy(SOURCE, path)
+    return api.QueryService(str(path))
+
+
+def _get(service, target):
+    response = api.dispatch(service, 'GET', target, {}, b'')
+    return _parse(response)
+
+
+def _post(service, target, body):
+    response = api.dispatch(service, 'POST', target, {}, body if isinstance(body, bytes) else json.dumps(body).encode())
+    return _parse(response)
+
+
+def _parse(response):
+    head, _, body = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(body)
+
+
+def test_top(service):
+    status, body = _get(service, '/top?year=2023&sex=Female&age_group=15-24&n=3')
+    assert status == 200
+    assert len(body['countries']) == 3
+
+
+@pytest.mark.parametrize('query', ['year=abc', 'year=2023.5', 'year=1e400', 'year=Infinity', 'n=1.5', 'n=1e400', 'n=true'])
+def test_invalid_integer_parameters(service, query):
+    params = dict(p.split('=') for p in 'year=2023&sex=Female&age_group=15-24'.split('&'))
+    params.update([query.split('=')])
+    status, body = _get(service, '/top?' + '&'.join(f'{k}={v}' for k, v in params.items()))
+    assert status == 400
+    assert 'must be an integer' in body['error']
+
+
+@pytest.mark.parametrize('target, status', [('/top?year=1850&sex=Female&age_group=15-24', 400),
+                                            ('/top?sex=Female&age_group=15-24', 400),
+                                            ('/nowhere', 404)])
+def test_dispatch_errors(service, target, status):
+    assert _get(service, target)[0] == status
+
+
+@pytest.mark.parametrize('value', [float('inf'), float('nan'), 2.5, True, '1e3', '', None, {'n': 1}])
+def test_batch_rejects_non_integers_per_item(service, value):
+    status, body = _post(service, '/batch', {'queries': [{**TOP, 'n': value}, {**TOP, 'n': 2}]})
+    assert status == 200
+    error, ok = body['results']
+    assert 'error' in error
+    assert len(ok['countries']) == 2
+
+
+def test_batch_accepts_integral_numbers(service):
+    status, body = _post(service, '/batch', {'queries': [{**TOP, 'year': 2023.0, 'n': '2'}, {**TOP, 'year': 10**400}]})
+    assert status == 200
+    found, missing = body['results']
+    assert len(found['countries']) == 2
+    assert missing['error'].startswith('no data for year')
+
+
+@pytest.mark.parametrize('body, status', [(b'not json', 400), ({'queries': 'top'}, 400),
+                                          ({'queries': [TOP] * (api.MAX_BATCH + 1)}, 400)])
+def test_batch_errors(service, body, status):
+    assert _post(service, '/batch', body)[0] == status
+
+
+def test_batch_requires_post(service):
+    assert _get(service, '/batch')[0] == 405
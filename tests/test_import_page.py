@@ -0,0 +1,42 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import profiling  # noqa: E402
+
+SLOW_MODULE = """
+import time
+time.sleep(0.2)
+
+
+def page():
+    return 'rendered'
+"""
+
+
+def test_concurrent_first_import_waits_for_module(tmp_path, monkeypatch):
+    (tmp_path / 'slow_page.py').write_text(SLOW_MODULE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, 'slow_page', raising=False)
+
+    results, errors = [], []
+    barrier = threading.Barrier(8)
+
+    def open_page():
+        barrier.wait()
+        try:
+            results.append(profiling.import_page('slow_page', 'page')())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=open_page) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert results == ['rendered'] * 8
+    assert 'slow_page' in profiling.IMPORT_TIMES
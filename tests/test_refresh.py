@@ -0,0 +1,58 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dataset  # noqa: E402
+
+SOURCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), dataset.DATA_FILE)
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / 'data.csv'
+    pd.read_csv(SOURCE).head(60).to_csv(path, index=False)
+    return str(path)
+
+
+def _rate(data, country, year):
+    rows = data.select(country_name=country, year=year)
+    return rows['unemployment_rate'].tolist()
+
+
+def _touch_later(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_append_year_column(csv_path):
+    watcher = dataset.DatasetWatcher(csv_path)
+    wide = pd.read_csv(csv_path)
+    wide['2025'] = 1.5
+    wide.to_csv(csv_path, index=False)
+    _touch_later(csv_path)
+
+    refreshed = dataset.refresh(watcher.data, csv_path)
+    assert refreshed is not None
+    assert 2025 in refreshed.cube.years.tolist()
+    assert _rate(refreshed, wide['country_name'][0], 2025) == [1.5] * (wide['country_name'] == wide['country_name'][0]).sum()
+
+
+def test_append_with_edit_reloads(csv_path):
+    watcher = dataset.DatasetWatcher(csv_path)
+    wide = pd.read_csv(csv_path)
+    country = wide['country_name'][0]
+    wide['2025'] = 1.5
+    wide.loc[wide['country_name'] == country, '2014'] = 99.0
+    wide.to_csv(csv_path, index=False)
+    _touch_later(csv_path)
+
+    assert dataset.refresh(watcher.data, csv_path) is None
+    assert set(_rate(watcher.get(), country, 2014)) == {99.0}
+    # The columnar cache written for the new CSV holds the edit too
+    frame, _ = dataset.load_tidy(csv_path)
+    edited = frame[(frame['country_name'] == country) & (frame['year'] == 2014)]
+    assert set(edited['unemployment_rate'].tolist()) == {99.0}